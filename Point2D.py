@@ -1,31 +1,49 @@
 import numpy as np
 
 class Point2D:
+    """
+    A single 2D point. The coordinates live in a 2-element float array, which
+    is either owned by the point or is a row of a PointBuffer (a view), so
+    writing p.x / p.y on a view updates the buffer in place.
+    """
+    __slots__ = ("_xy",)
+
     def __init__(self, x: float, y: float):
-        self.__x = x
-        self.__y = y
-    
+        self._xy = np.array([x, y], dtype=float)
+
+    @classmethod
+    def view(cls, row: np.ndarray):
+        p = cls.__new__(cls)
+        p._xy = row
+        return p
+
     @property
     def x(self):
-        return self.__x
-    
+        return self._xy[0]
+
     @x.setter
     def x(self, value):
-        self.__x = value
+        self._xy[0] = value
 
     @property
     def y(self):
-        return self.__y
-    
+        return self._xy[1]
+
     @y.setter
     def y(self, value):
-        self.__y = value
+        self._xy[1] = value
+
+    def __iter__(self):
+        return iter(self._xy)
+
+    def __repr__(self):
+        return f"Point2D({self.x}, {self.y})"
 
     def toVector(self):
         return np.array([self.x, self.y, 1.0])
-    
+
     @classmethod
-    def fromVector(self, vector: np.ndarray):
+    def fromVector(cls, vector: np.ndarray):
         if vector[2] == 0:
             raise ValueError("Can't divide by 0")
-        return cls(vector[0]/vector[2], vector[1]/vector[2])
\ No newline at end of file
+        return cls(vector[0]/vector[2], vector[1]/vector[2])
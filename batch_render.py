@@ -0,0 +1,200 @@
+"""
+Renders curve images headlessly from a JSON job file, spread over a
+process pool.
+
+    python batch_render.py jobs.json -o renders -j 8
+
+The job file holds a list of jobs, or {"defaults": {...}, "jobs": [...]}
+where defaults apply to every job. Each job is rendered by its own
+offscreen Canvas, with the same drawing code as the app:
+
+    {"type": "parametric", "curve": "spiral", "a": 0, "b": 20, "n": 500}
+    {"type": "expression", "x": "cos(3*u)", "y": "sin(5*u)", "a": 0, "b": 6.3, "n": 2000}
+    {"type": "hermite", "points": [[100, 100], [200, 50], ...], "steps": 200}
+    {"type": "interpolation", "points_file": "nodes.csv", "method": "newton", "samples": 500}
+
+"method" is one of lagrange (the default), newton or spline.
+
+Common keys: "size" ([width, height], default [800, 600]), "tolerance"
+(pixel tolerance for adaptive tessellation) and "output", a file name
+template formatted with the job's keys, e.g. "spiral_{a}_{b}_{n}.png".
+"points_file" is a text/CSV file of x, y rows relative to the job file.
+"sweep" maps keys to lists of values; the job is expanded into one job
+per combination:
+
+    {"type": "parametric", "curve": "spiral", "a": 0,
+     "sweep": {"b": [10, 20, 40], "n": [100, 1000]},
+     "output": "spiral_b{b}_n{n}.png"}
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+TYPES = ("parametric", "expression", "hermite", "interpolation")
+PARAMETRIC_CURVES = ("spiral", "ellipse", "parabola")
+METHODS = ("lagrange", "newton", "spline")
+
+DEFAULTS = {
+    "size": [800, 600],
+    "a": 0,
+    "b": 20,
+    "n": 100,
+    "steps": 200,
+    "samples": 100,
+    "method": "lagrange",
+    "tolerance": None,
+}
+
+_app = None
+
+
+def load_jobs(path: str) -> list[dict]:
+    """
+    Reads a job file and expands it into a flat list of complete jobs,
+    with points files loaded and output names filled in.
+    """
+    with open(path) as f:
+        spec = json.load(f)
+    if isinstance(spec, list):
+        spec = {"jobs": spec}
+
+    base = os.path.dirname(os.path.abspath(path))
+    defaults = {**DEFAULTS, **spec.get("defaults", {})}
+
+    jobs = []
+    for i, entry in enumerate(spec["jobs"]):
+        entry = {**defaults, **entry}
+        if entry.get("type") not in TYPES:
+            raise ValueError(f"job {i}: type must be one of {', '.join(TYPES)}")
+
+        if "points_file" in entry:
+            points_file = os.path.join(base, entry.pop("points_file"))
+            delimiter = "," if points_file.endswith(".csv") else None
+            entry["points"] = np.loadtxt(points_file, delimiter=delimiter, ndmin=2).tolist()
+
+        sweep = entry.pop("sweep", {})
+        keys = list(sweep)
+        for k, values in enumerate(itertools.product(*sweep.values())):
+            job = {**entry, **dict(zip(keys, values))}
+            if job["type"] == "interpolation" and job.get("method") not in METHODS:
+                raise ValueError(f"job {i}: method must be one of {', '.join(METHODS)}")
+            template = job.get("output") or f"{i:03d}_{job['type']}" + (f"_{k:03d}" if keys else "") + ".png"
+            job["output"] = template.format(**job)
+            jobs.append(job)
+    return jobs
+
+
+def init_worker():
+    # one QApplication per worker process; Qt isn't touched in the parent
+    global _app
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    _app = QApplication.instance() or QApplication([])
+
+    # the canvas reports mode changes on stdout
+    sys.stdout = open(os.devnull, "w")
+
+
+def render_job(job: dict, out_dir: str) -> tuple[str, float, str | None]:
+    """
+    Renders one job to a PNG; returns (path, seconds, error or None).
+    """
+    path = os.path.join(out_dir, job["output"])
+    start = time.perf_counter()
+    try:
+        image = render_image(job)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if not image.save(path):
+            raise OSError(f"could not write {path}")
+    except Exception as e:
+        return path, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+    return path, time.perf_counter() - start, None
+
+
+def render_image(job: dict):
+    from PyQt5.QtGui import QImage
+    from main import Canvas
+    from modes import Mode
+    from Point2D import Point2D
+
+    width, height = job["size"]
+    canvas = Canvas()
+    canvas.setMinimumSize(0, 0)
+    canvas.resize(width, height)
+    canvas.L, canvas.H = width, height
+    # everything is computed before rendering
+    canvas.background_threshold = float("inf")
+    canvas.adaptive_tolerance = job["tolerance"]
+
+    if job["type"] == "parametric":
+        if job.get("curve") not in PARAMETRIC_CURVES:
+            raise ValueError(f"curve must be one of {', '.join(PARAMETRIC_CURVES)}")
+        canvas.mode = Mode.PARAMETRIC
+        canvas.draw_parametric_curve(job["a"], job["b"], job["n"], getattr(canvas.curve, job["curve"]))
+
+    elif job["type"] == "expression":
+        canvas.draw_expression_curve(job["x"], job["y"], job["a"], job["b"], job["n"])
+
+    elif job["type"] == "hermite":
+        canvas.mode = Mode.COONS
+        canvas.points.extend(np.asarray(job["points"], dtype=float))
+        canvas.coons_steps = job["steps"]
+        canvas.compute_coons_curve()
+
+    elif job["type"] == "interpolation":
+        canvas.mode = Mode.INTERPOLATION
+        for x, y in job["points"]:
+            p = Point2D(x, y)
+            if not canvas.interpolation.can_add_point(p):
+                raise ValueError("interpolation nodes must have strictly increasing x")
+            canvas.interpolation.add_point(p)
+            canvas.add_point(p)
+
+        getattr(canvas.interpolation, f"compute_{job['method']}")(job["samples"])
+
+    image = QImage(width, height, QImage.Format_ARGB32)
+    canvas.render(image)
+    return image
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("jobs", help="JSON job file")
+    parser.add_argument("-o", "--output-dir", default="renders", help="directory for the PNGs")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.jobs)
+    workers = max(1, min(args.workers, len(jobs)))
+    start = time.perf_counter()
+
+    # spawned, not forked: Qt doesn't survive a fork
+    context = multiprocessing.get_context("spawn")
+    failed = 0
+    with ProcessPoolExecutor(workers, mp_context=context, initializer=init_worker) as pool:
+        chunksize = max(1, len(jobs) // (4 * workers))
+        for path, seconds, error in pool.map(render_job, jobs, itertools.repeat(args.output_dir),
+                                             chunksize=chunksize):
+            if error:
+                failed += 1
+                print(f"FAILED {path}: {error}", file=sys.stderr)
+            else:
+                print(f"{path}  {seconds * 1e3:.1f} ms")
+
+    elapsed = time.perf_counter() - start
+    print(f"{len(jobs) - failed}/{len(jobs)} images in {elapsed:.2f} s with {workers} workers",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
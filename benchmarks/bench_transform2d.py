@@ -0,0 +1,104 @@
+"""
+Microbenchmarks for Transform2D composition.
+
+Compares the six-scalar affine Transform2D against the previous 3x3
+matrix implementation (kept here as MatrixTransform2D) on:
+  - the cost of one call of each composition primitive
+  - accumulating thousands of incremental drag steps
+
+    python benchmarks/bench_transform2d.py [--steps 5000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transformare2D import Transform2D
+
+
+class MatrixTransform2D:
+    """The previous implementation: a fresh 3x3 matrix per operation."""
+    def __init__(self):
+        self._matrix = np.eye(3, dtype=float)
+
+    def _left_transform(self, transform_matrix):
+        self._matrix = transform_matrix @ self._matrix
+
+    def translation(self, dx, dy):
+        self._left_transform(np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=float))
+        return self
+
+    def scaling(self, sx, sy):
+        self._left_transform(np.array([[sx, 0, 0], [0, sy, 0], [0, 0, 1]], dtype=float))
+        return self
+
+    def rotation(self, cos_a, sin_a):
+        self._left_transform(np.array([[cos_a, -sin_a, 0], [sin_a, cos_a, 0], [0, 0, 1]], dtype=float))
+        return self
+
+    def scale_about_point(self, sx, sy, cx, cy):
+        return self.translation(-cx, -cy).scaling(sx, sy).translation(cx, cy)
+
+    def rotate_about_point(self, cos_a, sin_a, cx, cy):
+        return self.translation(-cx, -cy).rotation(cos_a, sin_a).translation(cx, cy)
+
+    def get_matrix(self):
+        return self._matrix
+
+
+COS, SIN = np.cos(0.01), np.sin(0.01)
+
+PRIMITIVES = {
+    "translation": lambda T: T.translation(1.5, -2.0),
+    "scaling": lambda T: T.scaling(1.0001, 1.0001),
+    "rotation": lambda T: T.rotation(COS, SIN),
+    "scale_about_point": lambda T: T.scale_about_point(1.0001, 1.0001, 320.0, 240.0),
+    "rotate_about_point": lambda T: T.rotate_about_point(COS, SIN, 320.0, 240.0),
+}
+
+
+def drag(T, steps):
+    # the mix of operations Canvas.mouseMoveEvent composes during a drag
+    for i in range(steps):
+        k = i % 3
+        if k == 0:
+            T.translation(0.5, -0.25)
+        elif k == 1:
+            T.scale_about_point(1.001, 1.001, 320.0, 240.0)
+        else:
+            T.rotate_about_point(COS, SIN, 320.0, 240.0)
+    return T
+
+
+def best(stmt, number, repeat):
+    return min(timeit.repeat(stmt, number=number, repeat=repeat)) / number
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'primitive':<22}{'matrix (us)':>14}{'affine (us)':>14}{'speedup':>10}")
+    for name, op in PRIMITIVES.items():
+        old_T, new_T = MatrixTransform2D(), Transform2D()
+        old = best(lambda: op(old_T), 20000, args.repeat) * 1e6
+        new = best(lambda: op(new_T), 20000, args.repeat) * 1e6
+        print(f"{name:<22}{old:>14.3f}{new:>14.3f}{old / new:>9.1f}x")
+
+    old = best(lambda: drag(MatrixTransform2D(), args.steps), 1, args.repeat) * 1e3
+    new = best(lambda: drag(Transform2D(), args.steps), 1, args.repeat) * 1e3
+    print(f"\n{args.steps} drag steps: matrix {old:.2f} ms, affine {new:.2f} ms ({old / new:.1f}x)")
+
+    diff = np.abs(drag(MatrixTransform2D(), args.steps).get_matrix()
+                  - drag(Transform2D(), args.steps).get_matrix()).max()
+    print(f"max matrix difference after {args.steps} steps: {diff:.3g}")
+
+
+if __name__ == "__main__":
+    main()
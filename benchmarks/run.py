@@ -0,0 +1,322 @@
+"""
+Headless benchmark suite for the curve engines and Canvas rendering.
+
+Sweeps control point counts, sample counts and canvas sizes over:
+  - HermiteCurve.compute (full and single-point drag)
+  - InterpolationCurve.compute_lagrange / compute_newton / compute_spline,
+    computed and served from the result cache
+  - ParametricCurve.compute_points + transform
+  - Transform2D.apply_to_point / apply_to_array over a polygon
+  - Canvas.paintEvent, rendered into an offscreen QImage
+
+Runs without a display (QT_QPA_PLATFORM=offscreen) and writes JSON or
+CSV. With --baseline it compares against a previous JSON run and exits
+with status 1 if any case got slower than --threshold times baseline.
+
+    python benchmarks/run.py --quick -o bench.json
+    python benchmarks/run.py --baseline bench.json --threshold 1.25
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Point2D import Point2D
+from hermit_curve import HermiteCurve
+from interpolation_curve import InterpolationCurve
+from parametric_curve import ParametricCurve
+from transformare2D import Transform2D
+
+
+def measure(fn, setup=None, repeat=5, min_time=0.05):
+    """
+    Best and mean seconds per call of fn(state), state = setup() (not
+    timed). Calls are batched until one batch takes at least min_time.
+    """
+    state = setup() if setup else None
+    fn(state)
+
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(state)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 16:
+            break
+        number *= 2
+
+    runs = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn(state)
+        runs.append((time.perf_counter() - start) / number)
+    return min(runs), sum(runs) / len(runs)
+
+
+def random_points(n, width=800, height=600, seed=0):
+    return np.random.default_rng(seed).random((n, 2)) * (width, height)
+
+
+def increasing_points(n, width=800, height=600, seed=0):
+    pts = random_points(n, width, height, seed)
+    pts[:, 0] = np.linspace(10, width - 10, n)
+    return pts
+
+
+def bench_hermite(sweep):
+    for n in sweep["control_points"]:
+        n -= n % 2
+        for steps in sweep["steps"]:
+            def setup():
+                h = HermiteCurve()
+                h.control_points.extend(random_points(n))
+                return h
+
+            def full(h):
+                h.clear_samples()
+                h.compute(steps)
+
+            def drag(h):
+                h.move_point(n // 2, 400.0, 300.0)
+                h.compute(steps)
+
+            params = {"control_points": n, "steps": steps}
+            yield "hermite.compute", params, measure(full, setup)
+            yield "hermite.drag", params, measure(drag, setup)
+
+
+def bench_interpolation(sweep):
+    for n in sweep["nodes"]:
+        for m in sweep["samples"]:
+            def setup():
+                curve = InterpolationCurve()
+                for x, y in increasing_points(n):
+                    curve.add_point(Point2D(x, y))
+                return curve
+
+            def uncached(compute):
+                # results are memoized; time the computation, not the lookup
+                def run(curve):
+                    curve.results.clear()
+                    compute(curve)
+                return run
+
+            params = {"nodes": n, "samples": m}
+            for method in ("lagrange", "newton", "spline"):
+                compute = getattr(InterpolationCurve, f"compute_{method}")
+                run = lambda c, compute=compute: compute(c, m)
+                yield f"interpolation.{method}", params, measure(uncached(run), setup)
+                yield f"interpolation.{method}.cached", params, measure(run, setup)
+
+
+def bench_parametric(sweep):
+    for n in sweep["parametric_samples"]:
+        def sampled():
+            curve = ParametricCurve()
+            curve.compute_points(0, 20, n, curve.spiral)
+            return curve
+
+        def run(curve):
+            curve.compute_points(0, 20, n, curve.spiral)
+            curve.transform(800, 600)
+            curve.points
+
+        params = {"samples": n}
+        yield "parametric.compute_transform", params, measure(run, ParametricCurve)
+        yield "parametric.resize", params, measure(lambda c: c.transform(801, 600), sampled)
+
+
+def bench_transform(sweep):
+    T = Transform2D().rotate_about_point(np.cos(0.1), np.sin(0.1), 400, 300).scaling(1.1, 0.9)
+    for n in sweep["polygon_vertices"]:
+        pts = random_points(n)
+        out = np.empty_like(pts)
+        params = {"vertices": n}
+        if n <= 10_000:
+            polygon = [Point2D(x, y) for x, y in pts]
+            yield "transform.apply_to_point", params, measure(
+                lambda _: [T.apply_to_point(p) for p in polygon])
+        yield "transform.apply_to_array", params, measure(lambda _: T.apply_to_array(pts, out=out))
+
+
+def bench_paint(sweep):
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QImage
+    from main import Canvas
+    from modes import Mode
+
+    app = QApplication.instance() or QApplication([])
+
+    def scene(mode, n, width, height):
+        canvas = Canvas()
+        canvas.resize(width, height)
+        canvas.L, canvas.H = width, height
+        # scenes must be complete before rendering
+        canvas.background_threshold = float("inf")
+        if mode == "edit":
+            canvas.points.extend(random_points(n, width, height))
+            canvas.mode = Mode.EDIT
+        elif mode == "coons":
+            canvas.points.extend(random_points(n - n % 2, width, height))
+            canvas.mode = Mode.COONS
+            canvas.compute_coons_curve()
+        elif mode == "interpolation":
+            canvas.mode = Mode.INTERPOLATION
+            for x, y in increasing_points(n, width, height):
+                p = Point2D(x, y)
+                canvas.interpolation.add_point(p)
+                canvas.add_point(p)
+            canvas.interpolation.compute_newton(1000)
+        elif mode == "parametric":
+            canvas.mode = Mode.PARAMETRIC
+            canvas.draw_parametric_curve(0, 20, n, canvas.curve.spiral)
+        return canvas, QImage(width, height, QImage.Format_ARGB32_Premultiplied)
+
+    modes = {"edit": "control_points", "coons": "control_points",
+             "interpolation": "nodes", "parametric": "parametric_samples"}
+
+    for width, height in sweep["canvas_sizes"]:
+        for mode, sizes in modes.items():
+            for n in sweep[sizes][:2]:
+                def cold(state):
+                    canvas, image = state
+                    canvas.invalidate_layers()
+                    canvas.render(image)
+
+                def warm(state):
+                    canvas, image = state
+                    canvas.render(image)
+
+                def setup():
+                    return scene(mode, n, width, height)
+
+                params = {"mode": mode, "n": n, "width": width, "height": height}
+                yield "paint.cold", params, measure(cold, setup, repeat=3)
+                yield "paint.warm", params, measure(warm, setup, repeat=3)
+
+
+SUITES = {
+    "hermite": bench_hermite,
+    "interpolation": bench_interpolation,
+    "parametric": bench_parametric,
+    "transform": bench_transform,
+    "paint": bench_paint,
+}
+
+FULL_SWEEP = {
+    "control_points": [100, 1_000, 10_000],
+    "steps": [50, 200],
+    "nodes": [50, 200, 1_000],
+    "samples": [100, 1_000],
+    "parametric_samples": [1_000, 100_000, 1_000_000],
+    "polygon_vertices": [1_000, 10_000, 100_000],
+    "canvas_sizes": [(800, 600), (1920, 1080)],
+}
+
+QUICK_SWEEP = {
+    "control_points": [100, 1_000],
+    "steps": [200],
+    "nodes": [50, 200],
+    "samples": [100],
+    "parametric_samples": [1_000, 100_000],
+    "polygon_vertices": [1_000, 100_000],
+    "canvas_sizes": [(800, 600)],
+}
+
+
+def key(result):
+    return result["case"] + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results, baseline, threshold):
+    """
+    Adds baseline/ratio fields to results and returns the regressions.
+    """
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in results:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        r["baseline"] = old["best"]
+        r["ratio"] = r["best"] / old["best"] if old["best"] else float("inf")
+        if r["ratio"] > threshold:
+            regressions.append(r)
+    return regressions
+
+
+def write_csv(results, stream):
+    fields = ["case", "params", "best", "mean", "baseline", "ratio"]
+    writer = csv.DictWriter(stream, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for r in results:
+        writer.writerow({**r, "params": json.dumps(r["params"], sort_keys=True)})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("suites", nargs="*", metavar="suite",
+                        help=f"suites to run, any of {', '.join(SUITES)} (default: all)")
+    parser.add_argument("--quick", action="store_true", help="smaller sweep")
+    parser.add_argument("-o", "--output", help="write results to this file (default: stdout)")
+    parser.add_argument("--format", choices=("json", "csv"), default=None,
+                        help="output format (default: from --output extension, else json)")
+    parser.add_argument("--baseline", help="JSON results of a previous run to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown ratio vs baseline counted as a regression")
+    args = parser.parse_args(argv)
+    for name in args.suites:
+        if name not in SUITES:
+            parser.error(f"unknown suite {name!r}")
+
+    sweep = QUICK_SWEEP if args.quick else FULL_SWEEP
+    results = []
+    for name in args.suites or SUITES:
+        for case, params, (best, mean) in SUITES[name](sweep):
+            results.append({"case": case, "params": params, "best": best, "mean": mean})
+            print(f"{case:<32}{json.dumps(params):<70}{best * 1e3:>12.4f} ms", file=sys.stderr)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['case']} {json.dumps(r['params'])}: "
+                  f"{r['baseline'] * 1e3:.4f} ms -> {r['best'] * 1e3:.4f} ms ({r['ratio']:.2f}x)",
+                  file=sys.stderr)
+
+    fmt = args.format or ("csv" if args.output and args.output.endswith(".csv") else "json")
+    report = {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "quick": args.quick,
+        "results": results,
+    }
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if fmt == "csv":
+            write_csv(results, out)
+        else:
+            json.dump(report, out, indent=2)
+            out.write("\n")
+    finally:
+        if args.output:
+            out.close()
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
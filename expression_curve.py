@@ -0,0 +1,98 @@
+import ast
+from functools import lru_cache
+
+import numpy as np
+
+
+# names an expression may use besides the parameter u
+SAFE_FUNCTIONS = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "arcsin": np.arcsin, "arccos": np.arccos, "arctan": np.arctan, "arctan2": np.arctan2,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "sqrt": np.sqrt,
+    "abs": np.abs, "sign": np.sign, "floor": np.floor, "ceil": np.ceil,
+    "minimum": np.minimum, "maximum": np.maximum, "hypot": np.hypot,
+    "where": np.where, "mod": np.mod, "power": np.power,
+}
+SAFE_CONSTANTS = {"pi": np.pi, "e": np.e}
+VARIABLE = "u"
+
+ALLOWED_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.Compare, ast.Call, ast.Name, ast.Load, ast.Constant,
+    ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow, ast.USub, ast.UAdd,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq, ast.NotEq,
+)
+
+
+# how many arguments each function takes; ufuncs know their own
+ARITY = {name: f.nin for name, f in SAFE_FUNCTIONS.items() if isinstance(f, np.ufunc)}
+ARITY["where"] = 3
+
+
+class ExpressionError(ValueError):
+    pass
+
+
+class _FloatConstants(ast.NodeTransformer):
+    # with float constants "9**9**9" overflows at once instead of building
+    # a huge int on the GUI thread
+    def visit_Constant(self, node):
+        return ast.copy_location(ast.Constant(float(node.value)), node)
+
+
+def validate(tree: ast.AST):
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ExpressionError(f"'{type(node).__name__}' is not allowed in an expression")
+
+        if isinstance(node, ast.Name):
+            if node.id != VARIABLE and node.id not in SAFE_FUNCTIONS and node.id not in SAFE_CONSTANTS:
+                raise ExpressionError(f"Unknown name '{node.id}'")
+
+        elif isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in SAFE_FUNCTIONS:
+                raise ExpressionError("Only whitelisted functions can be called")
+            if node.keywords:
+                raise ExpressionError("Keyword arguments are not allowed")
+            arity = ARITY[node.func.id]
+            if len(node.args) != arity:
+                raise ExpressionError(f"{node.func.id}() takes {arity} argument{'s' * (arity != 1)}, "
+                                      f"got {len(node.args)}")
+
+        elif isinstance(node, ast.Constant):
+            if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+                raise ExpressionError(f"Constant {node.value!r} is not a number")
+
+
+@lru_cache(maxsize=64)
+def compile_expression(text: str):
+    """
+    Parses an expression in u (e.g. "u*cos(u)"), checks it against the
+    whitelist and compiles it to a callable that evaluates it on a whole
+    NumPy array of u values. Cached by expression text.
+    """
+    try:
+        tree = ast.parse(text.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression {text!r}: {e.msg}") from None
+    validate(tree)
+    try:
+        tree = ast.fix_missing_locations(_FloatConstants().visit(tree))
+    except OverflowError:
+        raise ExpressionError(f"Invalid expression {text!r}: a constant is too large") from None
+
+    code = compile(tree, "<expression>", "eval")
+    namespace = {"__builtins__": {}, **SAFE_FUNCTIONS, **SAFE_CONSTANTS}
+
+    def f(u):
+        return eval(code, namespace, {VARIABLE: u})
+
+    # anything that still fails on a few sample values fails everywhere
+    try:
+        with np.errstate(all="ignore"):
+            f(np.linspace(0.0, 1.0, 3))
+    except (ArithmeticError, TypeError, ValueError) as e:
+        raise ExpressionError(f"Invalid expression {text!r}: {e}") from None
+
+    f.expression = text
+    return f
@@ -1,53 +1,200 @@
+from functools import lru_cache
+
+import numpy as np
 from Point2D import Point2D
+from point_buffer import PointBuffer
+from tessellation import adaptive_parameters
+
+
+def hermite_basis_at(u: np.ndarray) -> np.ndarray:
+    """
+    len(u) x 4 matrix with the Hermite basis F1..F4 at the given u values.
+    """
+    u2 = u*u
+    u3 = u*u*u
+
+    return np.column_stack((
+         2*u3 - 3*u2 + 1,   # F1
+        -2*u3 + 3*u2,       # F2
+         u3 - 2*u2 + u,     # F3
+         u3 - u2,           # F4
+    ))
+
+
+@lru_cache(maxsize=16)
+def hermite_basis(steps: int) -> np.ndarray:
+    """
+    (steps+1) x 4 matrix with the Hermite basis F1..F4 sampled at u = s/steps.
+    Cached per step count and read-only, since every segment shares it.
+    """
+    basis = hermite_basis_at(np.arange(steps + 1) / steps)
+    basis.flags.writeable = False
+    return basis
+
 
 class HermiteCurve:
     def __init__(self):
-        self.control_points = []   # P0, P1, P2, P3...
-        self.points = []           # punctele finale ale curbei
+        self.control_points = PointBuffer()   # P0, P1, P2, P3...
+        self.points = PointBuffer()           # punctele finale ale curbei
+
+        # per-segment sample blocks, (segments, steps+1, 2); self.points is a
+        # flat view over it. None in _dirty means every segment is dirty.
+        self._samples: np.ndarray | None = None
+        # adaptive mode: one variable-length block per segment instead
+        self._blocks: list[np.ndarray] | None = None
+        self._tolerance: tuple[float, int] | None = None
+        # per-segment bounding boxes (segments, 4): xmin, ymin, xmax, ymax
+        self._bounds: np.ndarray | None = None
+        self._steps: int | None = None
+        self._dirty: set[int] | None = None
 
     def add_point(self, p: Point2D):
         self.control_points.append(p)
+        self._dirty = None
 
-    def clear(self):
-        self.control_points = []
-        self.points = []
+    def move_point(self, i: int, x: float, y: float):
+        self.control_points[i] = (x, y)
+        if self._dirty is not None:
+            self._dirty.update(self.segments_using(i))
 
-    def compute(self, steps=100):
-        self.points = []
+    def clear(self):
+        self.control_points.clear()
+        self.clear_samples()
 
-        pts = self.control_points
-        n = len(pts)
+    def clear_samples(self):
+        self.points = PointBuffer()
+        self._samples = None
+        self._blocks = None
+        self._bounds = None
+        self._dirty = None
 
+    def segment_count(self) -> int:
+        n = len(self.control_points)
         if n < 4 or n % 2 != 0:
-            return
+            return 0
+        return (n - 2) // 2
+
+    def segments_using(self, i: int) -> range:
+        """
+        Segment s is built from control points 2s..2s+3, so a control point
+        belongs to at most two segments.
+        """
+        first = max(0, (i - 2) // 2)
+        last = min(i // 2, self.segment_count() - 1)
+        return range(first, last + 1)
+
+    def segment_points(self, s) -> np.ndarray:
+        """
+        Samples of segment s, or of a slice of consecutive segments joined
+        into one (M, 2) array.
+        """
+        if self._blocks is not None:
+            if isinstance(s, slice):
+                return np.concatenate(self._blocks[s])
+            return self._blocks[s]
+        return self._samples[s].reshape(-1, 2)
+
+    def segment_bounds(self, segments=None) -> np.ndarray:
+        if self._bounds is None:
+            return np.empty((0, 4))
+        if segments is None:
+            return self._bounds
+        return self._bounds[list(segments)]
+
+    def geometry(self, segments=None) -> np.ndarray:
+        """
+        Stacked (segments, 4, 2) geometry tensor: for each segment the rows
+        are A, B and the tangent vectors A1 - A, B1 - B.
+        """
+        pts = self.control_points.array
+        if segments is None:
+            segments = np.arange(self.segment_count())
+        first = 2 * np.asarray(segments, dtype=int)
+
+        A  = pts[first]
+        A1 = pts[first + 1]
+        B  = pts[first + 2]
+        B1 = pts[first + 3]
+
+        return np.stack((A, B, A1 - A, B1 - B), axis=1)
+
+    def compute(self, steps=100, tolerance: float | None = None,
+                max_samples: int = 100_000) -> np.ndarray:
+        """
+        Samples every segment at steps+1 uniform u values, or, with a
+        tolerance (in the units of the control points, i.e. pixels),
+        adaptively until each piece is flat within it, using at most
+        max_samples samples for the whole curve.
+        """
+        n_segments = self.segment_count()
+        if n_segments == 0:
+            self.clear_samples()
+            return self.points.array
+
+        if tolerance is not None:
+            return self.compute_adaptive(tolerance, max_samples)
+
+        basis = hermite_basis(steps)
+
+        full = (self._dirty is None or self._steps != steps
+                or self._samples is None or len(self._samples) != n_segments)
+
+        if full:
+            # (steps+1, 4) @ (segments, 4, 2) -> (segments, steps+1, 2)
+            self._samples = basis @ self.geometry()
+            self._bounds = np.concatenate((self._samples.min(axis=1),
+                                           self._samples.max(axis=1)), axis=1)
+            self._steps = steps
+            self._blocks = None
+            self._tolerance = None
+            self.points = PointBuffer.from_array(self._samples.reshape(-1, 2), copy=False)
+        elif self._dirty:
+            dirty = sorted(self._dirty)
+            block = basis @ self.geometry(dirty)
+            self._samples[dirty] = block
+            self._bounds[dirty] = np.concatenate((block.min(axis=1),
+                                                  block.max(axis=1)), axis=1)
+
+        self._dirty = set()
+        return self.points.array
+
+    def compute_adaptive(self, tolerance: float, max_samples: int) -> np.ndarray:
+        n_segments = self.segment_count()
+
+        full = (self._dirty is None or self._tolerance != (tolerance, max_samples)
+                or self._blocks is None or len(self._blocks) != n_segments)
 
+        if full:
+            self._blocks = [np.empty((0, 2))] * n_segments
+            self._bounds = np.empty((n_segments, 4))
+            segments = np.arange(n_segments)
+        else:
+            segments = np.array(sorted(self._dirty), dtype=int)
 
-        i = 0
-        while i + 3 < n:
-            A  = pts[i]
-            A1 = pts[i+1]
-            B  = pts[i+2]
-            B1 = pts[i+3]
+        if len(segments):
+            # the clean segments keep their samples; the rest share what is
+            # left of the budget
+            used = sum(len(block) for block in self._blocks) - sum(len(self._blocks[s]) for s in segments)
+            initial = 4
+            budget = max(max_samples - used, len(segments) * (initial + 1))
 
-            # vectori tangenta
-            ax = A1.x - A.x
-            ay = A1.y - A.y
-            bx = B1.x - B.x
-            by = B1.y - B.y
+            G = self.geometry(segments)
 
-            for s in range(steps+1):
-                u = s / steps
-                u2 = u*u
-                u3 = u*u*u
+            def evaluate(ids, u):
+                return np.einsum("nk,nkd->nd", hermite_basis_at(u), G[ids])
 
-                F1 =  2*u3 - 3*u2 + 1
-                F2 = -2*u3 + 3*u2
-                F3 =  u3 - 2*u2 + u
-                F4 =  u3 - u2
+            ids, u = adaptive_parameters(evaluate, len(segments), initial, tolerance, budget)
+            pts = evaluate(ids, u)
 
-                x = F1*A.x + F2*B.x + F3*ax + F4*bx
-                y = F1*A.y + F2*B.y + F3*ay + F4*by
+            counts = np.bincount(ids, minlength=len(segments))
+            for s, block in zip(segments, np.split(pts, np.cumsum(counts)[:-1])):
+                self._blocks[s] = block
+                self._bounds[s] = np.concatenate((block.min(axis=0), block.max(axis=0)))
 
-                self.points.append(Point2D(x, y))
+        self._samples = None
+        self._steps = None
+        self._tolerance = (tolerance, max_samples)
+        self._dirty = set()
 
-            i += 2
+        self.points = PointBuffer.from_array(np.concatenate(self._blocks), copy=False)
+        return self.points.array
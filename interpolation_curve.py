@@ -1,106 +1,367 @@
+import functools
+import hashlib
+import inspect
+
 import numpy as np
 from Point2D import Point2D
+from point_buffer import PointBuffer
+from memo_cache import ResultCache
+
+
+def memoized(compute):
+    """
+    Caches the points a compute_* method produces, keyed on the node set's
+    fingerprint and the method's arguments (defaults filled in), so asking
+    again for an unchanged curve just swaps the cached points in.
+    """
+    signature = inspect.signature(compute)
+
+    def result_key(self, *args, **kwargs) -> tuple:
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        return (self.fingerprint(), len(self.control_points), compute.__name__, *bound.args[1:])
+
+    @functools.wraps(compute)
+    def wrapper(self, *args, **kwargs):
+        key = result_key(self, *args, **kwargs)
+        points = self.results.get(key)
+        if points is None:
+            compute(self, *args, **kwargs)
+            self.results.put(key, self.points)
+        else:
+            self.points = points
+
+    wrapper.result_key = result_key
+    return wrapper
 
 class InterpolationCurve:
 
     def __init__(self):
-        self.control_points: list[Point2D] = []
-        self.points: list[Point2D] = []
+        self.control_points = PointBuffer()
+        self.points = PointBuffer()
+
+        # barycentric weights w_i = 1 / prod_{j != i} (x_i - x_j), kept as
+        # log|w_i| and sign(w_i) so they don't overflow for many nodes
+        self._log_w = np.empty(0)
+        self._w_sign = np.empty(0)
+
+        # Newton coefficients and the last column of the divided-difference
+        # table, extended one node at a time
+        self._newton_coeffs: list[float] = []
+        self._newton_edge: list[float] = []
+
+        # forward sweep (c'_i, d'_i) of the spline's tridiagonal system for
+        # every node but the last, and the start slope it was built for
+        # (None = natural); see spline_moments()
+        self._spline_cp: list[float] = []
+        self._spline_dp: list[float] = []
+        self._spline_start: float | None = None
+
+        # running hash of the nodes, see fingerprint(), and the computed
+        # curves it keys
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._hashed = 0
+        self.results = ResultCache(sizeof=lambda points: points.array.nbytes)
 
     def add_point(self, p: Point2D):
         self.control_points.append(p)
 
+    def clear(self):
+        self.control_points.clear()
+        # a new buffer: the old one may be held by the result cache
+        self.points = PointBuffer()
+        self._log_w = np.empty(0)
+        self._w_sign = np.empty(0)
+        self._newton_coeffs = []
+        self._newton_edge = []
+        self._spline_cp = []
+        self._spline_dp = []
+        self._spline_start = None
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._hashed = 0
+
+    def fingerprint(self) -> bytes:
+        """
+        Hash of the node coordinates. Nodes are only ever appended, so the
+        running hash is extended with the rows added since the last call
+        instead of hashing everything again.
+        """
+        n = len(self.control_points)
+        if n < self._hashed:
+            self._hash = hashlib.blake2b(digest_size=16)
+            self._hashed = 0
+        if n > self._hashed:
+            self._hash.update(self.control_points.array[self._hashed:].tobytes())
+            self._hashed = n
+        return self._hash.digest()
+
+    def has_result(self, method: str, *args, **kwargs) -> bool:
+        """
+        Whether getattr(self, method)(*args, **kwargs) would be a cache hit.
+        """
+        return getattr(type(self), method).result_key(self, *args, **kwargs) in self.results
+
+    def snapshot(self) -> "InterpolationCurve":
+        """
+        Independent copy of the nodes and the incremental weight/Newton
+        state, for computing on a worker thread while this one keeps
+        taking points.
+        """
+        copy = InterpolationCurve()
+        copy.control_points = self.control_points.copy()
+        copy.points = self.points
+        copy._log_w = self._log_w
+        copy._w_sign = self._w_sign
+        copy._newton_coeffs = list(self._newton_coeffs)
+        copy._newton_edge = list(self._newton_edge)
+        copy._spline_cp = list(self._spline_cp)
+        copy._spline_dp = list(self._spline_dp)
+        copy._spline_start = self._spline_start
+        copy._hash = self._hash.copy()
+        copy._hashed = self._hashed
+        # shared, so what a worker computes is cached for this curve too
+        copy.results = self.results
+        return copy
+
     def can_add_point(self, p: Point2D) -> bool:
-        if not self.control_points:
+        if not len(self.control_points):
             return True
         return p.x > self.control_points[-1].x
 
+    @memoized
     def compute_lagrange(self, m=100):
-        pts = self.control_points
-        n = len(pts) - 1
+        xs = self.control_points.xs
+        n = len(xs) - 1
         if n < 1:
-            self.points = []
+            self.points = PointBuffer()
             return
 
-        x0 = pts[0].x
-        xn = pts[-1].x
+        x0 = xs[0]
+        xn = xs[-1]
         dist = (xn - x0) / m
 
-        result = []
-        for index in range(m + 1):
-            x = x0 + index * dist
-            Lx = self.lagrange_value(x)
-            result.append(Point2D(x, Lx))
+        x = x0 + np.arange(m + 1) * dist
+        y = self.lagrange_values(x)
 
-        self.points = result
+        self.points = PointBuffer.from_array(np.column_stack((x, y)), copy=False)
 
-    def lagrange_value(self, x):
+    def barycentric_weights(self) -> np.ndarray:
         """
-        Computes L_n(x) using Lagrange formula
+        Barycentric weights of the current nodes, rescaled so the largest
+        is +-1 (the formula is invariant to a common factor). Nodes added
+        since the last call cost O(n) each.
+        """
+        xs = self.control_points.xs
+        k = len(self._log_w)
+        if k > len(xs):
+            self._log_w = np.empty(0)
+            self._w_sign = np.empty(0)
+            k = 0
+
+        for i in range(k, len(xs)):
+            diff = xs[:i] - xs[i]
+            log_diff = np.log(np.abs(diff))
+            sign = np.sign(diff)
+
+            self._log_w = np.append(self._log_w - log_diff, -log_diff.sum())
+            self._w_sign = np.append(self._w_sign * sign, np.prod(-sign))
+
+        if not len(self._log_w):
+            return np.empty(0)
+        return self._w_sign * np.exp(self._log_w - self._log_w.max())
+
+    def lagrange_values(self, x: np.ndarray) -> np.ndarray:
+        """
+        Evaluates L_n at every x at once with the second (true) barycentric
+        form: sum(w_i y_i / (x - x_i)) / sum(w_i / (x - x_i)).
         """
-        pts = self.control_points
-        n = len(pts)
+        xs = self.control_points.xs
+        ys = self.control_points.ys
+        w = self.barycentric_weights()
 
-        total = 0
-        for i in range(n):
-            xi, yi = pts[i].x, pts[i].y
-            li = 1
+        x = np.asarray(x, dtype=float)
+        diff = x[:, None] - xs[None, :]
 
-            for j in range(n):
-                if i == j:
-                    continue
-                xj = pts[j].x
-                li *= (x - xj) / (xi - xj)
+        exact = diff == 0
+        diff[exact] = 1.0
+        t = w / diff
+        values = (t @ ys) / t.sum(axis=1)
 
-            total += yi * li
+        # samples that land on a node take its value directly
+        rows, cols = np.nonzero(exact)
+        values[rows] = ys[cols]
+        return values
 
-        return total
+    def lagrange_value(self, x):
+        """
+        Computes L_n(x) using Lagrange formula
+        """
+        return self.lagrange_values(np.array([x]))[0]
 
 
     # tema_4 newton code
 
+    @memoized
     def compute_newton(self, m=100):
-        x = np.array([point.x for point in self.control_points], dtype=float)
-        y = np.array([point.y for point in self.control_points], dtype=float)
+        x = self.control_points.xs
+        if not len(x):
+            self.points = PointBuffer()
+            return
 
-        coeffs = self.divided_diferences(x, y)
+        coeffs = self.newton_coefficients()
 
         x_values = np.linspace(x[0], x[-1], m)
+        y_values = self.newton_eval(x, x_values, coeffs)
+
+        self.points = PointBuffer.from_array(np.column_stack((x_values, y_values)), copy=False)
 
-        result = []
-        for curve_point_x in x_values:
-            curve_point_y = self.newton_eval(x, curve_point_x, coeffs)
-            result.append(Point2D(curve_point_x, curve_point_y))
+    def newton_coefficients(self) -> np.ndarray:
+        """
+        Newton coefficients f[x_0], f[x_0, x_1], ... for the current nodes.
+        The divided-difference table is kept between calls: nodes are only
+        appended, so each new node adds one diagonal in O(n).
+        """
+        xs = self.control_points.xs
+        ys = self.control_points.ys
+        if len(self._newton_coeffs) > len(xs):
+            self._newton_coeffs = []
+            self._newton_edge = []
 
-        self.points = result
+        for k in range(len(self._newton_coeffs), len(xs)):
+            self._newton_coeffs.append(
+                self.extend_divided_diferences(self._newton_edge, xs, xs[k], ys[k]))
 
+        return np.array(self._newton_coeffs)
 
     def newton_eval(self, x, curve_point_x, a_0):
+        """
+        Horner scheme on the Newton form; curve_point_x may be a scalar or
+        an array of sample positions, which are all evaluated at once.
+        """
         n = len(a_0)
-        result = a_0[0]
-        prod = curve_point_x - x[0]
+        result = np.full(np.shape(curve_point_x), a_0[n - 1], dtype=float)
+
+        for h in range(n - 2, -1, -1):
+            result *= curve_point_x - x[h]
+            result += a_0[h]
 
-        for h in range (1, n):
-            result += a_0[h] * prod
-            prod *= curve_point_x - x[h]
+        return result
 
-        return result 
+    def extend_divided_diferences(self, edge: list, x, x_new, y_new):
+        """
+        edge[k] holds f[x_k, ..., x_{n-1}], the last column of the table.
+        Appending (x_new, y_new) rewrites that column in place and returns
+        the new top coefficient f[x_0, ..., x_n].
+        """
+        n = len(edge)
+        prev = y_new
+        edge.append(y_new)
+
+        for k in range(n - 1, -1, -1):
+            prev = (prev - edge[k]) / (x_new - x[k])
+            edge[k] = prev
+
+        return prev
 
     def divided_diferences(self, x, y):
-        n = len(x)
-        a = np.zeros((n, n), dtype=float)
+        edge = []
+        return [self.extend_divided_diferences(edge, x, x[k], y[k]) for k in range(len(x))]
 
-        for h in range(n):
-            a[h][h] = y[h]
 
-        for h in range(n-1, -1, -1):
-            for k in range(h+1, n):
-                a[h][k] = (a[h+1][k] - a[h][k-1])/(x[k] - x[h])
+    # cubic spline
 
-        return [a[0][j] for j in range(n)]
-    
+    @memoized
+    def compute_spline(self, m=100, end_slopes: tuple[float, float] | None = None):
+        """
+        Samples the natural cubic spline through the nodes at m+1 uniform
+        x values, or the clamped one with end_slopes = (S'(x_0), S'(x_n)).
+        """
+        xs = self.control_points.xs
+        n = len(xs) - 1
+        if n < 1:
+            self.points = PointBuffer()
+            return
+
+        x = xs[0] + np.arange(m + 1) * ((xs[-1] - xs[0]) / m)
+        y = self.spline_values(x, self.spline_moments(end_slopes))
+
+        self.points = PointBuffer.from_array(np.column_stack((x, y)), copy=False)
 
+    def spline_moments(self, end_slopes: tuple[float, float] | None = None) -> np.ndarray:
+        """
+        Second derivatives M_i of the spline at the nodes, from the
+        tridiagonal system
+
+            h_{i-1} M_{i-1} + 2 (h_{i-1} + h_i) M_i + h_i M_{i+1}
+                = 6 (s_i - s_{i-1}),    s_i = (y_{i+1} - y_i) / h_i
+
+        plus M_0 = M_n = 0 (natural) or the clamped end rows, solved with
+        the Thomas algorithm. The forward sweep of a row only depends on
+        the rows above it, and appending a node only adds a row at the
+        bottom, so the sweep is kept between calls and extended in O(1)
+        per new node. Only the last row and the back substitution are
+        redone each time.
+        """
+        xs = self.control_points.xs
+        n = len(xs) - 1
+        h = np.diff(xs)
+        s = np.diff(self.control_points.ys) / h
+
+        start = None if end_slopes is None else float(end_slopes[0])
+        if start != self._spline_start or len(self._spline_cp) > n:
+            self._spline_cp, self._spline_dp = [], []
+            self._spline_start = start
+        cp, dp = self._spline_cp, self._spline_dp
+
+        # both sweeps are recurrences; plain floats beat NumPy scalars there
+        hl, sl = h.tolist(), s.tolist()
+
+        if not cp:
+            if start is None:
+                cp.append(0.0)
+                dp.append(0.0)
+            else:
+                # 2 h_0 M_0 + h_0 M_1 = 6 (s_0 - S'(x_0))
+                cp.append(0.5)
+                dp.append(3 * (sl[0] - start) / hl[0])
+
+        for i in range(len(cp), n):
+            a, c = hl[i - 1], hl[i]
+            denom = 2 * (a + c) - a * cp[i - 1]
+            cp.append(c / denom)
+            dp.append((6 * (sl[i] - sl[i - 1]) - a * dp[i - 1]) / denom)
+
+        if end_slopes is None:
+            last = 0.0
+        else:
+            # h_{n-1} M_{n-1} + 2 h_{n-1} M_n = 6 (S'(x_n) - s_{n-1})
+            a = hl[n - 1]
+            last = (6 * (end_slopes[1] - sl[n - 1]) - a * dp[n - 1]) / (2 * a - a * cp[n - 1])
+
+        moments = [0.0] * (n + 1)
+        moments[n] = last
+        for i in range(n - 1, -1, -1):
+            last = dp[i] - cp[i] * last
+            moments[i] = last
+        return np.array(moments)
+
+    def spline_values(self, x: np.ndarray, moments: np.ndarray) -> np.ndarray:
+        """
+        Evaluates the spline at every x at once: searchsorted finds each
+        sample's interval, then the cubic on it is evaluated vectorized.
+        """
+        xs = self.control_points.xs
+        ys = self.control_points.ys
 
+        x = np.asarray(x, dtype=float)
+        i = np.clip(np.searchsorted(xs, x, side="right") - 1, 0, len(xs) - 2)
 
+        x0, x1 = xs[i], xs[i + 1]
+        y0, y1 = ys[i], ys[i + 1]
+        m0, m1 = moments[i], moments[i + 1]
+        h = x1 - x0
+        left, right = x - x0, x1 - x
 
-        
+        return ((m0 * right**3 + m1 * left**3) / (6 * h)
+                + (y0 / h - m0 * h / 6) * right
+                + (y1 / h - m1 * h / 6) * left)
@@ -0,0 +1,52 @@
+import numpy as np
+
+
+def run_indices(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """
+    Indices of the points that start or end a run of consecutive points
+    falling in the same tolerance-sized grid cell. Whatever the polyline
+    does inside a cell is smaller than the cell, so only the way in and
+    out of it is kept.
+    """
+    cells = np.floor(points / tolerance)
+    change = np.any(cells[1:] != cells[:-1], axis=1)
+
+    keep = np.empty(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    keep[1:-1] = change[1:] | change[:-1]
+    return np.flatnonzero(keep)
+
+
+def column_indices(points: np.ndarray, width: float) -> np.ndarray:
+    """
+    For a polyline with non-decreasing x: the first, last, lowest and
+    highest point of every column of the given width, in order. At most
+    four points per column, however steep the curve is inside it.
+    """
+    column = np.floor(points[:, 0] / width)
+    starts = np.flatnonzero(np.concatenate(([True], column[1:] != column[:-1])))
+    ends = np.concatenate((starts[1:], [len(points)])) - 1
+
+    # columns are contiguous, so sorting by (column, y) keeps each column
+    # in its own block with its lowest point first and highest last
+    group = np.repeat(np.arange(len(starts)), ends - starts + 1)
+    order = np.lexsort((points[:, 1], group))
+    return np.unique(np.concatenate((starts, ends, order[starts], order[ends])))
+
+
+def decimate(points: np.ndarray, tolerance: float = 0.5) -> np.ndarray:
+    """
+    Reduces a dense polyline to the points that matter when it is drawn
+    with a resolution of `tolerance` (in the points' own units; half a
+    pixel for screen coordinates). x-monotonic polylines, like the
+    interpolation curves, are cut per column, everything else per grid
+    cell. Returns the kept points in order.
+    """
+    if len(points) < 3:
+        return points
+
+    if np.all(np.diff(points[:, 0]) >= 0):
+        indices = column_indices(points, 2 * tolerance)
+    else:
+        indices = run_indices(points, tolerance)
+    return points[indices]
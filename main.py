@@ -1,17 +1,37 @@
 import sys
+import time
+
+# before the heavy imports, so --profile-startup sees them
+STARTED = time.perf_counter()
+
+from functools import cached_property
+from typing import TYPE_CHECKING
+
+# NumPy stays eager: PointBuffer, Transform2D and the painting code use it
+# from the first frame on
 import numpy as np
 
 from modes import Mode
 from Point2D import Point2D
+from point_buffer import PointBuffer
 from transformare2D import Transform2D
-from parametric_curve import ParametricCurve
-from interpolation_curve import InterpolationCurve
-from hermit_curve import HermiteCurve
-
-
-from PyQt5.QtGui import QPainter, QPixmap, QImage, QPen, QColor, QIcon
-from PyQt5.QtCore import Qt, QPoint, QPointF, QRect, QSize, pyqtSignal
-from PyQt5.uic import loadUi
+from spatial_index import PointGrid
+from qt_buffers import polygon_from_array, qtransform_from
+from lod import decimate
+from perf_hud import PerfRecorder, timed
+from ui_main import Ui_MainWindow
+
+# the curve engines are imported when their mode is first used, see the
+# cached properties on Canvas
+if TYPE_CHECKING:
+    from parametric_curve import ParametricCurve
+    from interpolation_curve import InterpolationCurve
+    from hermit_curve import HermiteCurve
+    from workers import CurveWorkers
+
+
+from PyQt5.QtGui import QPainter, QPixmap, QImage, QPen, QColor, QIcon, QPolygonF, QFont, QPalette
+from PyQt5.QtCore import Qt, QEvent, QObject, QPoint, QPointF, QRect, QRectF, QSize, QTimer, pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication,
     QMainWindow,
@@ -24,6 +44,7 @@ from PyQt5.QtWidgets import (
     QFileDialog,
     QColorDialog,
     QSpinBox,
+    QInputDialog,
 )
 
 
@@ -33,28 +54,32 @@ class Canvas(QWidget):
         super().__init__(parent)
 
         # Draw poligon
-        self.points: list[Point2D] = [] 
+        self.points = PointBuffer()
         self.drag_index: int | None = None
         self.drag_threshold: int = 14
         self.mode: Mode = Mode.EDIT
         self.point_radius: int = 8
 
+        # hit testing; rebuilt lazily when points are replaced wholesale
+        self.point_grid = PointGrid(cell_size=2 * self.drag_threshold)
+        self._grid_dirty: bool = False
+
         # Transformations
         self.T: Transform2D = Transform2D()
         self.drag_start: QPoint | None = None
-        self.original_points: list[Point2D] | None = None
+        self.original_points: PointBuffer | None = None
 
         self.geometric_center: Point2D | None = None
         self.start_angle: np.ndarray | None = None
 
-        # Parametric cuve
-        self.curve = ParametricCurve()
+        # Parametric cuve (self.curve, created on first use)
+        # (x(u), y(u), a, b, n) of recent expression curves, most recent last
+        self.recent_expressions: list[tuple[str, str, float, float, int]] = []
 
         self.L = self.width()
         self.H = self.height()
         
-        # interpolation curve
-        self.interpolation = InterpolationCurve()
+        # interpolation curve (self.interpolation, created on first use)
         self.interp_method = "lagrange"
 
         # Keyboard functions
@@ -66,52 +91,223 @@ class Canvas(QWidget):
 
         Qt.Key_1: self.set_method_lagrange,  
         Qt.Key_2: self.set_method_newton,
+        Qt.Key_3: self.set_method_spline,
 
         Qt.Key_H: self.set_mode_coons,
         Qt.Key_K: self.compute_coons_curve,
+
+        Qt.Key_A: self.toggle_adaptive,
+
+        Qt.Key_X: self.prompt_expression_curve,
+        Qt.Key_R: self.previous_expression_curve,
+
+        Qt.Key_P: self.toggle_hud,
+        Qt.Key_D: self.export_perf,
+
+        Qt.Key_S: self.save_scene,
+        Qt.Key_O: self.open_scene,
         }
 
-        #
-        self.hermite = HermiteCurve()
+        # Coons / Hermite curve (self.hermite, created on first use)
+        self.coons_steps: int = 200
+        # an opened scene leaves the Hermite samples to the first COONS
+        # paint, see ensure_coons_curve()
+        self._coons_stale: bool = False
+
+        # pixel flatness tolerance for adaptive tessellation, None = uniform
+        self.adaptive_tolerance: float | None = None
+
+        # cached QPixmap per static layer, see static_layers()
+        self._layers: dict[str, QPixmap] = {}
+
+        # polylines longer than lod_min_points are decimated to what shows
+        # at lod_tolerance pixels; (samples, viewport, polygon) per curve
+        self.lod_tolerance: float = 0.5
+        self.lod_min_points: int = 2048
+        self._lod: dict[str, tuple[PointBuffer, tuple[int, int], QPolygonF]] = {}
+
+        # frame timings; the overlay is an opaque child label so refreshing
+        # it never repaints the canvas underneath
+        self.perf = PerfRecorder()
+        self.hud = QLabel(self)
+        self.hud.setFont(QFont("monospace", 9))
+        self.hud.setAutoFillBackground(True)
+        palette = self.hud.palette()
+        palette.setColor(QPalette.Window, QColor(30, 30, 30))
+        palette.setColor(QPalette.WindowText, QColor(230, 230, 230))
+        self.hud.setPalette(palette)
+        self.hud.setContentsMargins(6, 4, 6, 4)
+        self.hud.move(8, 8)
+        self.hud.hide()
+        self._hud_refreshed: float = 0.0
+
+        # interpolation and parametric sampling run on worker threads
+        # (self.workers) once they produce about this many samples, see run_job()
+        self.background_threshold: float = 20_000
+
+        # motion events only record the latest pointer state; the work runs
+        # at most once per frame_interval ms, see schedule_frame()
+        self.frame_interval: int = 16
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setSingleShot(True)
+        self.frame_timer.timeout.connect(self.frame_tick)
+        self._last_frame: float = 0.0
+        self._pending_drag: tuple[float, float] | None = None
+        self._pending_transform: bool = False
 
         # Qt info
         self.setMinimumSize(500, 400)
         self.setFocusPolicy(Qt.StrongFocus)
 
+    @cached_property
+    def curve(self) -> "ParametricCurve":
+        from parametric_curve import ParametricCurve
+        return ParametricCurve()
+
+    @cached_property
+    def interpolation(self) -> "InterpolationCurve":
+        from interpolation_curve import InterpolationCurve
+        return InterpolationCurve()
+
+    @cached_property
+    def hermite(self) -> "HermiteCurve":
+        from hermit_curve import HermiteCurve
+        return HermiteCurve()
+
+    @cached_property
+    def workers(self) -> "CurveWorkers":
+        from workers import CurveWorkers
+        return CurveWorkers(self)
+
+    @timed("paint", frame=True)
     def paintEvent(self, event):
         painter = QPainter(self)
-        painter.fillRect(self.rect(), QColor(255, 255, 255))
-        pen = QPen(QColor(30, 30, 30))
-        pen.setWidth(2)
-        painter.setPen(pen)
+        dirty = event.rect()
+        partial = not dirty.contains(self.rect())
 
-        if self.mode in (Mode.EDIT, Mode.TRANSFORM, Mode.INTERPOLATION, Mode.COONS):
-            for p in self.points:
-                painter.setBrush(QColor(255, 255, 255))
-                painter.drawEllipse(QPointF(p.x, p.y), self.point_radius, self.point_radius)
+        painter.fillRect(dirty, QColor(255, 255, 255))
+        if self.mode == Mode.COONS:
+            self.ensure_coons_curve()
+        static = self.static_layers()
+
+        # cached layers, each followed by the live geometry that belongs
+        # at the same depth: markers, curve, axes
+        if "markers" in static:
+            painter.drawPixmap(0, 0, self.layer("markers"))
+
+        markers = self.live_markers()
+        if partial:
+            markers = markers[self.visible_mask(markers, dirty, self.marker_margin())]
+        self.draw_markers(painter, markers)
+
+        if "curve" in static:
+            painter.drawPixmap(0, 0, self.layer("curve"))
+
+        pen = self.curve_pen()
+        painter.setPen(pen)
 
         if self.mode == Mode.TRANSFORM and len(self.points) > 1:
-            for i in range(len(self.points) - 1):
-                painter.drawLine(
-                    QPointF(self.points[i].x, self.points[i].y),
-                    QPointF(self.points[i+1].x, self.points[i+1].y)
-                )
-                
-            painter.drawLine(
-                QPointF(self.points[-1].x, self.points[-1].y),
-                QPointF(self.points[0].x, self.points[0].y)
-            )
-        elif self.mode == Mode.PARAMETRIC and self.curve.points:
-            pen = QPen(QColor(30, 30, 30))
-            pen.setWidth(2)
-            painter.setPen(pen)
-
-            for i in range(len(self.curve.points) - 1):
-                p1 = self.curve.points[i]
-                p2 = self.curve.points[i+1]
-                painter.drawLine(QPointF(p1.x, p1.y), QPointF(p2.x, p2.y))
-
-            #draw axes
+            self.count_polyline(len(self.points) + 1)
+            painter.setBrush(Qt.NoBrush)
+            painter.drawPolygon(polygon_from_array(self.points.array))
+
+        elif self.mode == Mode.COONS:
+            segments = self.live_segments()
+            if partial and len(segments):
+                bounds = self.hermite.segment_bounds(segments)
+                segments = segments[self.visible_mask(bounds, dirty, pen.width())]
+            for s in segments:
+                block = self.hermite.segment_points(s)
+                self.count_polyline(len(block))
+                painter.drawPolyline(polygon_from_array(block))
+
+        if "axes" in static:
+            painter.drawPixmap(0, 0, self.layer("axes"))
+
+        if self.perf.enabled:
+            self.refresh_hud()
+
+    def static_layers(self) -> tuple[str, ...]:
+        """
+        Layers whose content only changes on explicit invalidation in the
+        current mode. TRANSFORM redraws everything on each move, so it
+        has none.
+        """
+        if self.mode == Mode.EDIT:
+            return ("markers",)
+        if self.mode in (Mode.INTERPOLATION, Mode.COONS):
+            return ("markers", "curve")
+        if self.mode == Mode.PARAMETRIC:
+            return ("curve", "axes")
+        return ()
+
+    def live_markers(self) -> np.ndarray:
+        if self.mode == Mode.TRANSFORM:
+            return self.points.array
+        if self.drag_index is not None and self.mode in (Mode.EDIT, Mode.COONS):
+            return self.points.array[[self.drag_index]]
+        return np.empty((0, 2))
+
+    def live_segments(self) -> np.ndarray:
+        """
+        Hermite segments that move with the dragged point; they are kept
+        out of the curve layer and drawn every frame instead.
+        """
+        if self.drag_index is None or len(self.hermite.control_points) != len(self.points):
+            return np.empty(0, dtype=int)
+        return np.array(self.hermite.segments_using(self.drag_index), dtype=int)
+
+    def layer(self, name: str) -> QPixmap:
+        pixmap = self._layers.get(name)
+        if pixmap is None:
+            ratio = self.devicePixelRatioF()
+            pixmap = QPixmap(self.size() * ratio)
+            pixmap.setDevicePixelRatio(ratio)
+            pixmap.fill(Qt.transparent)
+
+            painter = QPainter(pixmap)
+            self.paint_layer(name, painter)
+            painter.end()
+            self._layers[name] = pixmap
+        return pixmap
+
+    def invalidate_layers(self, *names: str):
+        for name in names or list(self._layers):
+            self._layers.pop(name, None)
+
+    def paint_layer(self, name: str, painter: QPainter):
+        if name == "markers":
+            markers = self.points.array
+            if self.drag_index is not None:
+                markers = np.delete(markers, self.drag_index, axis=0)
+            self.draw_markers(painter, markers)
+
+        elif name == "curve":
+            painter.setPen(self.curve_pen())
+
+            if self.mode == Mode.PARAMETRIC and len(self.curve.raw_points):
+                # raw samples through the view transform, so a resize never
+                # remaps them; the cosmetic pen keeps the width in pixels
+                pen = self.curve_pen()
+                pen.setCosmetic(True)
+                painter.setPen(pen)
+                painter.setTransform(qtransform_from(self.curve.view))
+                painter.drawPolyline(self.parametric_polygon())
+                painter.resetTransform()
+
+            elif self.mode == Mode.INTERPOLATION and len(self.interpolation.points) > 1:
+                painter.drawPolyline(self.lod_polygon("interpolation", self.interpolation.points))
+
+            elif self.mode == Mode.COONS:
+                # one polyline per run of segments that are not being dragged
+                keep = np.ones(len(self.hermite.segment_bounds()), dtype=bool)
+                keep[self.live_segments()] = False
+                for a, b in self.mask_runs(keep):
+                    block = self.lod_points(self.hermite.segment_points(slice(a, b)))
+                    self.count_polyline(len(block))
+                    painter.drawPolyline(polygon_from_array(block))
+
+        elif name == "axes" and len(self.curve.raw_points):
             axis_pen = QPen(QColor(0, 0, 255))
             axis_pen.setWidth(3)
             painter.setPen(axis_pen)
@@ -126,49 +322,92 @@ class Canvas(QWidget):
             D = Point2D(origin.x, self.H)
             self.draw_arrow(painter, D, C)
 
-        elif self.mode == Mode.INTERPOLATION:
-            pts = self.interpolation.points
-            if len(pts) > 1:
-                for i in range(len(pts) - 1):
-                    p1 = pts[i]
-                    p2 = pts[i + 1]
-                    painter.drawLine(QPointF(p1.x, p1.y),
-                                    QPointF(p2.x, p2.y))
-                    
-        elif self.mode == Mode.COONS:
-            if self.hermite:
-                for i in range(len(self.hermite.points) - 1):
-                    p1 = self.hermite.points[i]
-                    p2 = self.hermite.points[i+1]
-                    painter.drawLine(QPointF(p1.x, p1.y), QPointF(p2.x, p2.y))
+    def parametric_polygon(self) -> QPolygonF:
+        # raw samples, drawn through the view transform: its uniform scale
+        # turns the pixel tolerance into curve units
+        return self.lod_polygon("parametric", self.curve.raw_points, self.curve.scale_factor)
+
+    def lod_points(self, points: np.ndarray, scale: float = 1.0) -> np.ndarray:
+        if len(points) <= self.lod_min_points:
+            return points
+        return decimate(points, self.lod_tolerance / scale)
+
+    def lod_polygon(self, name: str, samples: PointBuffer, scale: float = 1.0) -> QPolygonF:
+        """
+        Decimated polygon of a curve's samples, cached until the curve is
+        resampled (a new buffer) or the viewport size changes.
+        """
+        viewport = (self.L, self.H)
+        cached = self._lod.get(name)
+        if cached is None or cached[0] is not samples or cached[1] != viewport:
+            points = self.lod_points(samples.array, scale)
+            cached = (samples, viewport, polygon_from_array(points))
+            self._lod[name] = cached
+
+        polygon = cached[2]
+        self.count_polyline(polygon.size())
+        return polygon
+
+    def count_polyline(self, n: int):
+        self.perf.count("samples", n)
+        self.perf.count("segments", max(n - 1, 0))
+
+    def refresh_hud(self):
+        # a few times per second is plenty to read and keeps the cost off the frames
+        now = time.perf_counter()
+        if now - self._hud_refreshed < 0.25:
+            return
+        self._hud_refreshed = now
+        self.hud.setText("\n".join(self.perf.summary()))
+        self.hud.adjustSize()
+
+    def toggle_hud(self):
+        self.hud.setVisible(self.perf.toggle())
+        self._hud_refreshed = 0.0
+        print("Performance HUD:", "ON" if self.perf.enabled else "OFF")
+
+    def export_perf(self, path: str | None = None):
+        if not self.perf.frames:
+            print("No frames recorded, press P to start recording")
+            return
+        path = path or time.strftime("perf-%Y%m%d-%H%M%S.json")
+        self.perf.export(path)
+        print(f"Exported {len(self.perf.frames)} frames to {path}")
+
+    def curve_pen(self) -> QPen:
+        pen = QPen(QColor(30, 30, 30))
+        pen.setWidth(2)
+        return pen
 
     def resizeEvent(self, event):
         self.L = self.width()
         self.H = self.height()
 
-        if self.mode == Mode.PARAMETRIC and self.curve.raw_points:
+        if self.mode == Mode.PARAMETRIC and len(self.curve.raw_points):
             self.curve.transform(self.L, self.H)
 
+        self.invalidate_layers()
         self.update()
         return super().resizeEvent(event)
 
+    @timed("mouse")
     def mousePressEvent(self, event):
 
         if self.mode in (Mode.EDIT, Mode.COONS): 
 
             if event.button() == Qt.LeftButton:
                 pos = event.pos()
-                
-                for i, p in enumerate(self.points):
-                    mouse_point = Point2D(pos.x(), pos.y())
-                    if self.euclidian_distance(p, mouse_point) <= self.drag_threshold:
-                        self.drag_index = i
-                        self.setCursor(Qt.ClosedHandCursor)
-                        self.update()
-                        return
-                
-                self.points.append(Point2D(pos.x(), pos.y()))
-                self.update()
+
+                i = self.pick_point(pos.x(), pos.y())
+                if i is not None:
+                    self.drag_index = i
+                    self.setCursor(Qt.ClosedHandCursor)
+                    # the dragged point and its segments become live geometry
+                    self.invalidate_layers("markers", "curve")
+                    return
+
+                self.add_point(Point2D(pos.x(), pos.y()))
+                self.update(self.marker_rect(pos.x(), pos.y()))
                 
         elif Mode.TRANSFORM == self.mode:
 
@@ -192,33 +431,45 @@ class Canvas(QWidget):
                 p = Point2D(event.x(), event.y())
 
                 if self.interpolation.can_add_point(p):
+                    # a pending curve would be for the old nodes
+                    self.workers.cancel("interpolation")
                     self.interpolation.add_point(p)
-                    self.points.append(p)
+                    self.add_point(p)
+                    self.update(self.marker_rect(p.x, p.y))
                 else:
                     print("Invalid point: x must be strictly increasing.")
 
-                self.update()
-
             elif event.button() == Qt.RightButton:
+                # computed on a copy, so points can still be added meanwhile
+                snapshot = self.interpolation.snapshot()
+                nodes = len(snapshot.control_points)
                 if self.interp_method == "lagrange":
-                    self.interpolation.compute_lagrange()
+                    method, m, work = "compute_lagrange", 100, 100 * nodes
+                elif self.interp_method == "newton":
+                    method, m, work = "compute_newton", 100, 100 * nodes
                 else:
-                    self.interpolation.compute_newton()
+                    # O(n) to solve and O(m) to sample, so it can afford
+                    # enough samples to follow every node
+                    m = max(100, 10 * nodes)
+                    method, work = "compute_spline", m + nodes
+
+                if snapshot.has_result(method, m):
+                    work = 0  # cached, no point in a worker
 
-                self.update()
+                def job():
+                    getattr(snapshot, method)(m)
+                    return snapshot
 
+                self.run_job("interpolation", work, job, self.interpolation_ready)
+
+    @timed("mouse")
     def mouseMoveEvent(self, event):
 
         if self.mode in (Mode.EDIT, Mode.COONS):
             if self.drag_index is not None and (event.buttons() & Qt.LeftButton):
-                pos = event.pos()
-                self.points[self.drag_index].x = pos.x()
-                self.points[self.drag_index].y = pos.y()
-                
-                if self.mode == Mode.COONS:
-                    self.compute_coons_curve()
-
-                self.update()
+                # only where the point ends up matters
+                self._pending_drag = (event.x(), event.y())
+                self.schedule_frame()
                 return
 
         elif Mode.TRANSFORM == self.mode:
@@ -238,14 +489,15 @@ class Canvas(QWidget):
 
                     cx, cy = self.geometric_center.x, self.geometric_center.y
                     self.T.scale_about_point(factor, factor, cx, cy)
-                    self.apply_transformation()
 
                 else:
                     self.T.translation(dx, dy)
-                    self.apply_transformation()
-                    
+
+                # T is composed for every event, so the result is exact;
+                # remapping the points waits for the next tick
+                self._pending_transform = True
+                self.schedule_frame()
                 self.drag_start = event.pos()
-                self.update()
 
             if (event.buttons() & Qt.RightButton) and self.drag_start is not None:
                 cx, cy = self.geometric_center.x, self.geometric_center.y
@@ -261,13 +513,69 @@ class Canvas(QWidget):
                 sin_a = np.sin(delta_angle)
 
                 self.T.rotate_about_point(cos_a, sin_a, cx, cy)
-                self.apply_transformation()
-                
+                self._pending_transform = True
+                self.schedule_frame()
+
                 self.start_angle = current_angle
 
-                self.update()
+    def schedule_frame(self):
+        # right away when idle, otherwise a frame after the last tick
+        if not self.frame_timer.isActive():
+            elapsed = (time.perf_counter() - self._last_frame) * 1e3
+            self.frame_timer.start(max(0, int(self.frame_interval - elapsed)))
+
+    @timed("tick")
+    def frame_tick(self):
+        self._last_frame = time.perf_counter()
+        self.flush_frame()
+
+    def flush_frame(self):
+        """
+        Runs the work coalesced since the last tick: at most one drag
+        recompute and one remap of the transformed points. Both end in
+        update() calls, which Qt merges into a single repaint.
+        """
+        self.frame_timer.stop()
+        if self._pending_drag is not None:
+            x, y = self._pending_drag
+            self._pending_drag = None
+            self.drag_to(x, y)
+
+        if self._pending_transform:
+            self._pending_transform = False
+            self.apply_transformation()
+
+    def drag_to(self, x: float, y: float):
+        """
+        Moves the dragged point and, in COONS mode, recomputes the
+        segments that use it, repainting only where they were and are.
+        """
+        old = self.points[self.drag_index]
+        damage = self.marker_rect(old.x, old.y)
+
+        self.move_point(self.drag_index, x, y)
+        damage = damage.united(self.marker_rect(x, y))
+
+        if self.mode == Mode.COONS:
+            self.ensure_coons_curve()
+            if len(self.hermite.control_points) != len(self.points):
+                self.compute_coons_curve()
+                return
+
+            # only the segments using the dragged point change;
+            # repaint where they were and where they are now
+            segments = self.hermite.segments_using(self.drag_index)
+            damage = damage.united(self.bounds_rect(self.hermite.segment_bounds(segments)))
+            self.hermite.move_point(self.drag_index, x, y)
+            with self.perf.stage("coons"):
+                self.hermite.compute(steps=self.coons_steps, tolerance=self.adaptive_tolerance)
+            damage = damage.united(self.bounds_rect(self.hermite.segment_bounds(segments)))
+
+        self.update(damage)
 
+    @timed("mouse")
     def mouseReleaseEvent(self, event):
+        self.flush_frame()
         if self.mode == Mode.TRANSFORM:
             self.drag_start = None
             self.start_angle = None
@@ -275,13 +583,17 @@ class Canvas(QWidget):
             if event.button() == Qt.LeftButton and self.drag_index is not None:
                 self.drag_index = None
                 self.setCursor(Qt.ArrowCursor)
+                self.invalidate_layers("markers", "curve")
             return
         # self.start_angle = None
 
+    @timed("keys")
     def keyPressEvent(self, event):
         func = self.keymap.get(event.key())
         if func:
+            self.flush_frame()
             func()
+            self.invalidate_layers()
             self.update()
         else:
             super().keyPressEvent(event)
@@ -294,7 +606,7 @@ class Canvas(QWidget):
         self.mode = Mode.TRANSFORM
         self.T = Transform2D()
         # if self.original_points is None:
-        self.original_points = [Point2D(p.x, p.y) for p in self.points]
+        self.original_points = self.points.copy()
         print("Mode: TRANSFORM")
 
     def set_mode_parametric(self):
@@ -305,13 +617,16 @@ class Canvas(QWidget):
     def set_mode_interpolation(self):
         self.mode = Mode.INTERPOLATION
         self.points.clear()
-        self.interpolation.control_points = []
-        self.interpolation.points = []
+        self.point_grid.clear()
+        self.workers.cancel("interpolation")
+        self.interpolation.clear()
         print("Mode: INTERPOLATION")
 
     def set_mode_coons(self):
         self.mode = Mode.COONS
-        self.hermite = HermiteCurve()
+        # a fresh curve, created on access
+        self.__dict__.pop("hermite", None)
+        self._coons_stale = False
         print("Mode: COONS")
 
     def set_method_lagrange(self):
@@ -322,37 +637,430 @@ class Canvas(QWidget):
         self.interp_method = "newton"
         print("Interpolation method: NEWTON")
 
+    def set_method_spline(self):
+        self.interp_method = "spline"
+        print("Interpolation method: CUBIC SPLINE")
+
+    def toggle_adaptive(self):
+        self.adaptive_tolerance = None if self.adaptive_tolerance is not None else 0.25
+        print("Tessellation:", "ADAPTIVE" if self.adaptive_tolerance is not None else "UNIFORM")
+
+        if self.mode == Mode.COONS and self.hermite.segment_count():
+            self.compute_coons_curve()
+        elif self.mode == Mode.PARAMETRIC and self.curve.last_expressions:
+            self.draw_expression_curve(*self.curve.last_expressions, self.curve.last_a,
+                                       self.curve.last_b, self.curve.last_n)
+        elif self.mode == Mode.PARAMETRIC and self.curve.last_funcs:
+            self.draw_parametric_curve(self.curve.last_a, self.curve.last_b,
+                                       self.curve.last_n, *self.curve.last_funcs)
+
+    @timed("coons")
     def compute_coons_curve(self):
+        self._coons_stale = False
         self.hermite.clear()
-        for p in self.points:
-            self.hermite.add_point(p)
+        self.hermite.control_points.extend(self.points)
 
-        self.hermite.compute(steps=200)
+        self.hermite.compute(steps=self.coons_steps, tolerance=self.adaptive_tolerance)
         # print("Computed Coons curve with", len(self.hermite.points), "points")
+        self.invalidate_layers("curve")
         self.update()
 
+    def ensure_coons_curve(self):
+        if self._coons_stale:
+            self._coons_stale = False
+            with self.perf.stage("coons"):
+                self.hermite.compute(steps=self.coons_steps, tolerance=self.adaptive_tolerance)
+
+    def add_point(self, p: Point2D):
+        self.points.append(p)
+        self.invalidate_layers("markers")
+        if not self._grid_dirty:
+            self.point_grid.insert(len(self.points) - 1, p.x, p.y)
+
+    def move_point(self, i: int, x: float, y: float):
+        p = self.points[i]
+        if not self._grid_dirty:
+            self.point_grid.move(i, p.x, p.y, x, y)
+        p.x = x
+        p.y = y
+        if i != self.drag_index:
+            self.invalidate_layers("markers")
+
+    def pick_point(self, x: float, y: float) -> int | None:
+        if self._grid_dirty:
+            self.point_grid.rebuild(self.points.array)
+            self._grid_dirty = False
+        return self.point_grid.find(self.points.array, x, y, self.drag_threshold)
+
     def euclidian_distance(self, p1: Point2D, p2: Point2D) -> float:
         dx = p1.x - p2.x
         dy = p1.y - p2.y
         return (dx * dx + dy * dy) ** 0.5
     
     def compute_centroid(self) -> Point2D:
-        if not self.points:
+        if not len(self.points):
             return Point2D(0, 0)
-        
-        x_sum = sum(p.x for p in self.points)
-        y_sum = sum(p.y for p in self.points)
-        n = len(self.points)
-        return Point2D(x_sum / n, y_sum / n)
+
+        cx, cy = self.points.array.mean(axis=0)
+        return Point2D(cx, cy)
     
+    @timed("transform")
     def apply_transformation(self):
-        self.points = [self.T.apply_to_point(p) for p in self.original_points]
+        self.points = self.T.apply_to_points(self.original_points, out=self.points)
+        self._grid_dirty = True
+        self.invalidate_layers("markers")
+        self.update()
+
+    def run_job(self, kind: str, work: int, fn, on_result):
+        """
+        Runs fn() on a worker thread when work (about the number of samples
+        it evaluates) reaches background_threshold, otherwise right away;
+        small jobs aren't worth the thread hop. on_result(result) runs on
+        the GUI thread, and only for the newest job of its kind, so the
+        last good curve stays on screen until then.
+        """
+        def done(result, seconds):
+            if self.perf.enabled:
+                self.perf.add_time(kind, seconds)
+            on_result(result)
+
+        if work < self.background_threshold:
+            self.workers.cancel(kind)
+            start = time.perf_counter()
+            result = fn()
+            done(result, time.perf_counter() - start)
+        else:
+            self.workers.submit(kind, fn, done, on_error=lambda e: print("Invalid curve:", e))
+
+    def interpolation_ready(self, curve: "InterpolationCurve"):
+        self.interpolation = curve
+        self.invalidate_layers("curve")
         self.update()
 
     def draw_parametric_curve(self, a, b, n, *args):
-        self.curve.compute_points(a, b, n, *args)
+        tolerance, size = self.adaptive_tolerance, (self.L, self.H)
+
+        def job():
+            return self.curve.sample_points(a, b, n, *args, tolerance=tolerance, size=size)
+
+        def ready(pts):
+            self.curve.set_curve(a, b, n, args, pts)
+            self.show_parametric_curve()
+
+        # adaptive refinement evaluates about three points per interval
+        self.run_job("parametric", n if tolerance is None else 3 * n, job, ready)
+
+    def show_parametric_curve(self):
         self.curve.transform(self.L, self.H)
+        self.invalidate_layers("curve", "axes")
+        self.update()
+
+    def marker_margin(self) -> int:
+        # radius plus the outline drawn around it
+        return self.point_radius + 2
+
+    def marker_rect(self, x: float, y: float) -> QRect:
+        m = self.marker_margin()
+        return QRectF(x - m, y - m, 2 * m, 2 * m).toAlignedRect()
+
+    def bounds_rect(self, bounds: np.ndarray, margin: float = 2) -> QRect:
+        """
+        Rectangle covering (k, 4) xmin, ymin, xmax, ymax boxes plus a margin
+        for the pen width.
+        """
+        if not len(bounds):
+            return QRect()
+        x0, y0 = bounds[:, :2].min(axis=0) - margin
+        x1, y1 = bounds[:, 2:].max(axis=0) + margin
+        return QRectF(x0, y0, x1 - x0, y1 - y0).toAlignedRect()
+
+    def visible_mask(self, geometry: np.ndarray, rect: QRect, margin: float) -> np.ndarray:
+        """
+        Which rows of an (N, 2) point array or (N, 4) bounding box array come
+        within margin of rect.
+        """
+        x0, y0 = rect.left() - margin, rect.top() - margin
+        x1, y1 = rect.right() + 1 + margin, rect.bottom() + 1 + margin
+        lo, hi = geometry[:, :2], geometry[:, -2:]
+        return ((hi[:, 0] >= x0) & (lo[:, 0] <= x1) &
+                (hi[:, 1] >= y0) & (lo[:, 1] <= y1))
+
+    def mask_runs(self, mask: np.ndarray):
+        """
+        (start, stop) index pairs of the runs of True in mask.
+        """
+        edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+        return zip(np.flatnonzero(edges == 1), np.flatnonzero(edges == -1))
+
+    def draw_markers(self, painter: QPainter, points: np.ndarray):
+        """
+        Draws every control point marker with two batched drawPoints calls:
+        wide round points in the outline colour, then narrower white ones on
+        top, which looks like the outlined, white-filled circles.
+        """
+        if not len(points):
+            return
+        self.perf.count("points", len(points))
+        polygon = polygon_from_array(points)
+
+        outline = QPen(QColor(30, 30, 30))
+        outline.setWidth(2 * self.point_radius + 2)
+        outline.setCapStyle(Qt.RoundCap)
+        painter.setPen(outline)
+        painter.drawPoints(polygon)
+
+        fill = QPen(QColor(255, 255, 255))
+        fill.setWidth(2 * self.point_radius - 2)
+        fill.setCapStyle(Qt.RoundCap)
+        painter.setPen(fill)
+        painter.drawPoints(polygon)
+
+    def prompt_expression_curve(self):
+        last = self.recent_expressions[-1] if self.recent_expressions else ("u*cos(u)", "u*sin(u)", 0, 20, 100)
+
+        x_expr, ok = QInputDialog.getText(self, "Parametric curve", "x(u) =", text=last[0])
+        if not ok:
+            return
+        y_expr, ok = QInputDialog.getText(self, "Parametric curve", "y(u) =", text=last[1])
+        if not ok:
+            return
+        interval, ok = QInputDialog.getText(self, "Parametric curve", "a, b, n =",
+                                            text=f"{last[2]}, {last[3]}, {last[4]}")
+        if not ok:
+            return
+
+        try:
+            a, b, n = interval.split(",")
+            if int(n) < 1:
+                raise ValueError("n must be at least 1")
+            self.draw_expression_curve(x_expr, y_expr, float(a), float(b), int(n))
+        except ValueError as e:
+            print("Invalid curve:", e)
+
+    def previous_expression_curve(self):
+        # flips between the two most recent curves, both served from cache
+        if len(self.recent_expressions) > 1:
+            self.draw_expression_curve(*self.recent_expressions[-2])
+
+    def draw_expression_curve(self, x_expr: str, y_expr: str, a: float, b: float, n: int):
+        from expression_curve import compile_expression
+
+        tolerance, size = self.adaptive_tolerance, (self.L, self.H)
+        # parse errors surface here, before anything changes
+        f = compile_expression(x_expr)
+        g = compile_expression(y_expr)
+
+        def show():
+            # only a curve that sampled fine becomes current and recent
+            entry = (x_expr, y_expr, a, b, n)
+            if entry in self.recent_expressions:
+                self.recent_expressions.remove(entry)
+            self.recent_expressions = self.recent_expressions[-7:] + [entry]
+
+            self.mode = Mode.PARAMETRIC
+            print(f"Mode: PARAMETRIC x(u) = {x_expr}, y(u) = {y_expr}")
+            self.invalidate_layers()
+            self.show_parametric_curve()
+
+        if self.curve.load_expression(x_expr, y_expr, a, b, n, tolerance, size):
+            self.workers.cancel("parametric")
+            show()
+            return
+
+        def job():
+            return self.curve.sample_points(a, b, n, f, g, tolerance=tolerance, size=size)
+
+        def ready(pts):
+            self.curve.store_expression(x_expr, y_expr, a, b, n, tolerance, size, pts)
+            show()
+
+        self.run_job("parametric", n if tolerance is None else 3 * n, job, ready)
+
+    def save_scene(self, path: str | None = None):
+        from scene_io import save_scene
+
+        if path is None:
+            path, _ = QFileDialog.getSaveFileName(self, "Save scene", "", "Drawing scenes (*.scene)")
+            if not path:
+                return
+            if "." not in path.rsplit("/", 1)[-1]:
+                path += ".scene"
+
+        arrays = {
+            "points": self.points.array,
+            "hermite": self.hermite.control_points.array,
+            "interpolation_nodes": self.interpolation.control_points.array,
+            "interpolation_curve": self.interpolation.points.array,
+            "parametric": self.curve.raw_points.array,
+        }
+        settings = {
+            "mode": self.mode.name,
+            "interp_method": self.interp_method,
+            "coons_steps": self.coons_steps,
+            "adaptive_tolerance": self.adaptive_tolerance,
+            "parametric": self.parametric_settings(),
+        }
+        try:
+            save_scene(path, arrays, settings)
+        except OSError as e:
+            print("Could not save scene:", e)
+            return
+        print(f"Saved scene to {path}")
+
+    def parametric_settings(self) -> dict | None:
+        curve = self.curve
+        if not len(curve.raw_points):
+            return None
+
+        # built-in curves are stored by name, other callables can't be
+        # and only their samples are kept
+        function = None
+        funcs = curve.last_funcs or ()
+        if len(funcs) == 1 and getattr(funcs[0], "__self__", None) is curve:
+            function = funcs[0].__name__
+
+        return {
+            "a": curve.last_a, "b": curve.last_b, "n": curve.last_n,
+            "expressions": curve.last_expressions,
+            "function": function,
+            "bounds": [curve.raw_min.tolist(), curve.raw_max.tolist()],
+        }
+
+    def open_scene(self, path: str | None = None):
+        from scene_io import SceneError, load_scene
+        from expression_curve import compile_expression
+        from parametric_curve import ParametricCurve
+        from interpolation_curve import InterpolationCurve
+        from hermit_curve import HermiteCurve
+
+        if path is None:
+            path, _ = QFileDialog.getOpenFileName(self, "Open scene", "", "Drawing scenes (*.scene)")
+            if not path:
+                return
+        try:
+            arrays, settings = load_scene(path)
+        except (OSError, SceneError) as e:
+            print("Could not open scene:", e)
+            return
+
+        # everything is checked before the canvas changes
+        try:
+            self.check_scene(arrays, settings)
+        except SceneError as e:
+            print("Could not open scene:", e)
+            return
+        parametric = settings.get("parametric")
+
+        empty = np.empty((0, 2))
+        arrays = {name: arrays.get(name, empty) for name in
+                  ("points", "hermite", "interpolation_nodes", "interpolation_curve", "parametric")}
+
+        self.workers.cancel("interpolation")
+        self.workers.cancel("parametric")
+        self.drag_index = None
+        self._pending_drag = None
+        self._pending_transform = False
+
+        self.mode = Mode[settings.get("mode", "EDIT")]
+        self.interp_method = settings.get("interp_method", self.interp_method)
+        self.coons_steps = settings.get("coons_steps", self.coons_steps)
+        self.adaptive_tolerance = settings.get("adaptive_tolerance")
+
+        # the buffers wrap the memory-mapped arrays; they are only copied
+        # once points get appended
+        self.points = PointBuffer.from_array(arrays["points"], copy=False)
+        self._grid_dirty = True
+
+        # sampled on the first COONS paint; a large curve would otherwise
+        # hold up opening the scene whatever its mode
+        self.hermite = HermiteCurve()
+        self.hermite.control_points = PointBuffer.from_array(arrays["hermite"], copy=False)
+        self._coons_stale = len(self.hermite.control_points) > 0
+
+        self.interpolation = InterpolationCurve()
+        self.interpolation.control_points = PointBuffer.from_array(arrays["interpolation_nodes"], copy=False)
+        self.interpolation.points = PointBuffer.from_array(arrays["interpolation_curve"], copy=False)
+
+        self.curve = ParametricCurve()
+        if parametric is not None:
+            function = parametric["function"]
+            funcs = (getattr(self.curve, function),) if function else ()
+            if parametric["expressions"]:
+                funcs = tuple(compile_expression(e) for e in parametric["expressions"])
+            bounds = tuple(np.array(b) for b in parametric["bounds"])
+            self.curve.set_curve(parametric["a"], parametric["b"], parametric["n"], funcs,
+                                 arrays["parametric"], bounds)
+            if parametric["expressions"]:
+                self.curve.last_expressions = tuple(parametric["expressions"])
+            self.curve.transform(self.L, self.H)
+
+        if self.mode == Mode.TRANSFORM:
+            self.T = Transform2D()
+            self.original_points = self.points.copy()
+
+        self.invalidate_layers()
         self.update()
+        print(f"Opened {path}: {len(self.points)} points, mode {self.mode.name}")
+
+    def check_scene(self, arrays: dict[str, np.ndarray], settings: dict):
+        """
+        Raises SceneError unless the settings and arrays of a loaded scene
+        can all be applied to the canvas. Point arrays are memory-mapped
+        and only the interpolation nodes are read.
+        """
+        from scene_io import SceneError
+        from expression_curve import ExpressionError, compile_expression
+        from parametric_curve import CURVES
+
+        def number(value) -> bool:
+            return isinstance(value, (int, float)) and not isinstance(value, bool) and np.isfinite(value)
+
+        if settings.get("mode", "EDIT") not in Mode.__members__:
+            raise SceneError(f"unknown mode {settings.get('mode')!r}")
+        if settings.get("interp_method", "lagrange") not in ("lagrange", "newton", "spline"):
+            raise SceneError(f"unknown interpolation method {settings.get('interp_method')!r}")
+        steps = settings.get("coons_steps", self.coons_steps)
+        if not isinstance(steps, int) or isinstance(steps, bool) or steps < 1:
+            raise SceneError(f"coons_steps must be a positive integer, got {steps!r}")
+        tolerance = settings.get("adaptive_tolerance")
+        if tolerance is not None and not (number(tolerance) and tolerance > 0):
+            raise SceneError(f"adaptive_tolerance must be a positive number, got {tolerance!r}")
+
+        nodes = arrays.get("interpolation_nodes")
+        if nodes is not None and np.any(np.diff(nodes[:, 0]) <= 0):
+            raise SceneError("interpolation nodes must have strictly increasing x")
+
+        parametric = settings.get("parametric")
+        if parametric is None:
+            return
+        if not isinstance(parametric, dict) or not {"a", "b", "n", "expressions", "function",
+                                                    "bounds"} <= parametric.keys():
+            raise SceneError("bad parametric settings")
+        if not (number(parametric["a"]) and number(parametric["b"])):
+            raise SceneError("parametric a and b must be numbers")
+        n = parametric["n"]
+        if not isinstance(n, int) or isinstance(n, bool) or n < 1:
+            raise SceneError(f"parametric n must be a positive integer, got {n!r}")
+        if parametric["function"] is not None and parametric["function"] not in CURVES:
+            raise SceneError(f"unknown parametric curve {parametric['function']!r}")
+        if not len(arrays.get("parametric", ())):
+            raise SceneError("parametric settings without samples")
+
+        bounds = parametric["bounds"]
+        if (not isinstance(bounds, list) or len(bounds) != 2 or
+                not all(isinstance(b, list) and len(b) == 2 and all(map(number, b)) for b in bounds)):
+            raise SceneError(f"bad parametric bounds {bounds!r}")
+
+        expressions = parametric["expressions"]
+        if expressions is not None:
+            if (not isinstance(expressions, list) or len(expressions) != 2 or
+                    not all(isinstance(e, str) for e in expressions)):
+                raise SceneError(f"bad parametric expressions {expressions!r}")
+            try:
+                for e in expressions:
+                    compile_expression(e)
+            except ExpressionError as e:
+                raise SceneError(str(e)) from None
 
     def draw_arrow(self, painter: QPainter, start: Point2D, end: Point2D, size=10):
         painter.drawLine(QPointF(start.x, start.y), QPointF(end.x, end.y))
@@ -376,17 +1084,59 @@ class Canvas(QWidget):
         painter.drawLine(QPointF(end.x, end.y), QPointF(wing2.x, wing2.y))
     
 
-class MainWindow(QMainWindow):
+class MainWindow(QMainWindow, Ui_MainWindow):
     def __init__(self):
         super(MainWindow, self).__init__()
-        loadUi("main.ui", self)
+        # compiled from main.ui with: python -m PyQt5.uic.pyuic main.ui -o ui_main.py
+        self.setupUi(self)
         self.canvas = Canvas(self)
         self.setCentralWidget(self.canvas)
         self.setWindowTitle("Drawing App")
 
 
+class StartupProfiler(QObject):
+    """
+    Prints how long each startup phase took, from the start of main.py to
+    the canvas' first paint, then quits. Installed by --profile-startup.
+    """
+    def __init__(self, app: QApplication, canvas: Canvas, marks: list[tuple[str, float]]):
+        super().__init__(canvas)
+        self.app = app
+        self.marks = marks
+        canvas.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            # runs once this paint event has been handled
+            QTimer.singleShot(0, self.report)
+        return False
+
+    def report(self):
+        self.marks.append(("first paint", time.perf_counter()))
+        previous = STARTED
+        for name, t in self.marks:
+            print(f"{name:<14}{(t - previous) * 1e3:8.1f} ms", file=sys.stderr)
+            previous = t
+        print(f"{'total':<14}{(previous - STARTED) * 1e3:8.1f} ms", file=sys.stderr)
+
+        engines = [m for m in ("parametric_curve", "interpolation_curve", "hermit_curve") if m in sys.modules]
+        print("curve engines loaded:", ", ".join(engines) or "none", file=sys.stderr)
+        self.app.quit()
+
+
 if __name__ == "__main__":
+    profile = "--profile-startup" in sys.argv
+    if profile:
+        sys.argv.remove("--profile-startup")
+    marks = [("imports", time.perf_counter())]
+
     app = QApplication(sys.argv)
+    marks.append(("QApplication", time.perf_counter()))
     window = MainWindow()
+    marks.append(("window", time.perf_counter()))
+
+    if profile:
+        StartupProfiler(app, window.canvas, marks)
     window.show()
-    app.exec()
\ No newline at end of file
+    app.exec()
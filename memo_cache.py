@@ -0,0 +1,71 @@
+import threading
+from collections import OrderedDict
+
+
+class ResultCache:
+    """
+    LRU cache of computed results bounded by their total size in bytes.
+    Safe to share between the GUI thread and the curve workers.
+
+    sizeof(value) gives an entry's size; values bigger than the whole
+    limit are not stored.
+    """
+
+    def __init__(self, limit_bytes: int = 32 * 2**20, sizeof=lambda value: value.nbytes):
+        self.limit_bytes = limit_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if size > self.limit_bytes:
+                return
+
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            self._evict()
+
+    def set_limit(self, limit_bytes: int):
+        with self._lock:
+            self.limit_bytes = limit_bytes
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "bytes": self.nbytes, "limit_bytes": self.limit_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    def _evict(self):
+        while self.nbytes > self.limit_bytes:
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
@@ -1,12 +1,39 @@
+from collections import OrderedDict
+
 import numpy as np
 from Point2D import Point2D
+from point_buffer import PointBuffer
+from transformare2D import Transform2D
+from tessellation import adaptive_parameters
+from expression_curve import compile_expression
+
+# the built-in curves, methods of ParametricCurve; scenes store them by name
+CURVES = ("spiral", "ellipse", "parabola")
+
+
+def finite_points(pts: np.ndarray) -> np.ndarray:
+    """
+    The rows of an (N, 2) sample array that are finite, as long as at
+    least two are and their extent is finite too; ValueError otherwise.
+    """
+    finite = np.isfinite(pts).all(axis=1)
+    if not finite.all():
+        pts = pts[finite]
+    with np.errstate(over="ignore"):
+        if len(pts) < 2 or not np.isfinite(pts.max(axis=0) - pts.min(axis=0)).all():
+            raise ValueError("the curve has no finite extent over [a, b]")
+    return pts
 
 
 class ParametricCurve:
 
     def __init__(self):
-        self.raw_points: list[Point2D] = []
-        self.points: list[Point2D] = []
+        self.raw_points = PointBuffer()
+        self._points: PointBuffer | None = PointBuffer()
+
+        # bounding box of raw_points, cached when sampling
+        self.raw_min = np.zeros(2)
+        self.raw_max = np.zeros(2)
 
         self.min_x = 0
         self.min_y = 0
@@ -14,117 +41,220 @@ class ParametricCurve:
         self.dx_center = 0
         self.dy_center = 0
 
+        # S' -> S'''' fused into one affine map, see view_transform()
+        self.view = Transform2D()
+
         # stored params for resize
         self.last_a = None
         self.last_b = None
         self.last_n = None
         self.last_funcs = None
+        self.last_expressions: tuple[str, str] | None = None
+
+        # raw samples of recent expression curves, least recently used first
+        self.expression_cache: OrderedDict[tuple, tuple] = OrderedDict()
+        self.expression_cache_size = 16
+
+    def compute_points(self, a: float, b: float, n: int, *args,
+                       tolerance: float | None = None, size: tuple[float, float] | None = None,
+                       max_samples: int = 20_000):
+        """
+        Samples the curve and makes it the current one, see sample_points().
+        """
+        pts = self.sample_points(a, b, n, *args, tolerance=tolerance, size=size,
+                                 max_samples=max_samples)
+        self.set_curve(a, b, n, args, pts)
+
+    def sample_points(self, a: float, b: float, n: int, *args,
+                      tolerance: float | None = None, size: tuple[float, float] | None = None,
+                      max_samples: int = 20_000) -> np.ndarray:
+        """
+        Samples the curve at n+1 uniform parameter values. With a tolerance
+        (in pixels) and the target size (L, H), the first min(n, 64) of
+        those intervals are only the starting grid: they are refined until
+        each piece is flat within tolerance once fitted to the screen,
+        using at most max_samples samples, so flat curves stay coarse
+        however large n is.
+
+        Samples where the curve isn't finite (log(u) at 0, overflowing
+        exp, ...) are dropped; a ValueError is raised when fewer than two
+        are left.
+
+        Doesn't touch the curve's state, so it is safe to run on a worker
+        thread.
+        """
+        if len(args) not in (1, 2):
+            raise ValueError("Must pass either 1 or 2 functions")
+        if n < 1:
+            raise ValueError("n must be at least 1")
+
+        sample = self.sampler(*args)
+        if tolerance is None or size is None:
+            return finite_points(sample(a + np.arange(n + 1) * (b - a) / n))
+
+        # pixels per curve unit once fitted, as in view_transform(), from
+        # the starting grid
+        initial = min(n, 64)
+        pts = finite_points(sample(a + np.arange(initial + 1) * (b - a) / initial))
+        extent = pts.max(axis=0) - pts.min(axis=0)
+        extent[extent == 0] = 1
+        scale = min(size[0] / extent[0], size[1] / extent[1])
 
-    def compute_points(self, a: float, b: float, n: int, *args):
+        def evaluate(ids, t):
+            return sample(a + t * (b - a)) * scale
+
+        # pieces with a non-finite end are never split, see finite_points()
+        with np.errstate(invalid="ignore"):
+            _, t = adaptive_parameters(evaluate, 1, initial, tolerance, max(max_samples, initial + 1))
+        return finite_points(sample(a + t * (b - a)))
+
+    def set_curve(self, a: float, b: float, n: int, funcs: tuple, pts: np.ndarray,
+                  bounds: tuple[np.ndarray, np.ndarray] | None = None):
         self.last_a = a
         self.last_b = b
         self.last_n = n
-        self.last_funcs = args
-
-        pts = []
-        for i in range(n + 1):
-            u = a + i * (b - a) / n
+        self.last_funcs = funcs
+        self.last_expressions = None
+        self.set_raw_points(pts, bounds)
 
-            if len(args) == 1:
-                f_u, g_u = args[0](u)
-            elif len(args) == 2:
-                f, g = args
-                f_u = f(u)
-                g_u = g(u)
-            else:
-                raise ValueError("Must pass either 1 or 2 functions")
+    def set_raw_points(self, pts: np.ndarray, bounds: tuple[np.ndarray, np.ndarray] | None = None):
+        self.raw_points = PointBuffer.from_array(pts, copy=False)
+        if bounds is None:
+            bounds = (pts.min(axis=0), pts.max(axis=0))
+        self.raw_min, self.raw_max = bounds
+        self._points = None
 
-            pts.append(Point2D(f_u, g_u))
+    def compute_expression(self, x_expr: str, y_expr: str, a: float, b: float, n: int,
+                           tolerance: float | None = None, size: tuple[float, float] | None = None):
+        """
+        Samples the curve (x(u), y(u)) given as expression strings. Both the
+        compiled expressions and the sampled points are cached, so going
+        back to a recent curve costs neither a parse nor a resample.
+        """
+        if not self.load_expression(x_expr, y_expr, a, b, n, tolerance, size):
+            f = compile_expression(x_expr)
+            g = compile_expression(y_expr)
+            pts = self.sample_points(a, b, n, f, g, tolerance=tolerance, size=size)
+            self.store_expression(x_expr, y_expr, a, b, n, tolerance, size, pts)
 
-        self.raw_points = pts
+    def expression_key(self, x_expr, y_expr, a, b, n, tolerance, size) -> tuple:
+        return (x_expr, y_expr, a, b, n, tolerance, size if tolerance is not None else None)
 
-    def step1_translate(self, pts):
-        self.min_x = min(p.x for p in pts)
-        self.min_y = min(p.y for p in pts)
+    def load_expression(self, x_expr: str, y_expr: str, a: float, b: float, n: int,
+                        tolerance: float | None = None, size: tuple[float, float] | None = None) -> bool:
+        """
+        Makes a cached expression curve the current one; False on a miss.
+        """
+        key = self.expression_key(x_expr, y_expr, a, b, n, tolerance, size)
+        cached = self.expression_cache.get(key)
+        if cached is None:
+            return False
 
-        return [
-            Point2D(p.x - self.min_x, p.y - self.min_y)
-            for p in pts
-        ]
+        self.expression_cache.move_to_end(key)
+        funcs = (compile_expression(x_expr), compile_expression(y_expr))
+        self.set_curve(a, b, n, funcs, *cached)
+        self.last_expressions = (x_expr, y_expr)
+        return True
 
-    def step2_scale(self, pts, L, H):
-        max_x = max(p.x for p in pts)
-        max_y = max(p.y for p in pts)
+    def store_expression(self, x_expr: str, y_expr: str, a: float, b: float, n: int,
+                         tolerance: float | None, size: tuple[float, float] | None, pts: np.ndarray):
+        """
+        Makes freshly sampled expression points the current curve and
+        caches them.
+        """
+        funcs = (compile_expression(x_expr), compile_expression(y_expr))
+        self.set_curve(a, b, n, funcs, pts)
+        self.last_expressions = (x_expr, y_expr)
 
-        max_x = max_x if max_x != 0 else 1
-        max_y = max_y if max_y != 0 else 1
+        key = self.expression_key(x_expr, y_expr, a, b, n, tolerance, size)
+        self.expression_cache[key] = (self.raw_points.array, (self.raw_min, self.raw_max))
+        while len(self.expression_cache) > self.expression_cache_size:
+            self.expression_cache.popitem(last=False)
 
-        Sx = L / max_x
-        Sy = H / max_y
-        self.scale_factor = min(Sx, Sy)
+    def sampler(self, *args):
+        """
+        Vectorized sampling function u-array -> (N, 2) points for the given
+        curve function(s).
+        """
+        def sample(u: np.ndarray) -> np.ndarray:
+            # non-finite values are dropped afterwards, see finite_points()
+            with np.errstate(all="ignore"):
+                try:
+                    return self.evaluate(u, *args)
+                except (TypeError, ValueError):
+                    # not NumPy-aware (math.* calls, branching on u, ...)
+                    return np.array([self.evaluate(ui, *args) for ui in u], dtype=float).reshape(-1, 2)
 
-        return [
-            Point2D(p.x * self.scale_factor,
-                    p.y * self.scale_factor)
-            for p in pts
-        ]
+        return sample
 
-    def step3_center(self, pts, L, H):
-        max_x = max(p.x for p in pts)
-        max_y = max(p.y for p in pts)
+    def evaluate(self, u, *args) -> np.ndarray:
+        """
+        Evaluates the curve function(s) at u, a scalar or an array of
+        parameter values, and stacks the result as (..., 2) points.
+        """
+        if len(args) == 1:
+            f_u, g_u = args[0](u)
+        else:
+            f, g = args
+            f_u = f(u)
+            g_u = g(u)
 
-        self.dx_center = (L - max_x) / 2
-        self.dy_center = (H - max_y) / 2
+        shape = np.shape(u)
+        f_u = np.broadcast_to(np.asarray(f_u, dtype=float), shape)
+        g_u = np.broadcast_to(np.asarray(g_u, dtype=float), shape)
+        return np.stack((f_u, g_u), axis=-1)
 
-        return [
-            Point2D(p.x + self.dx_center,
-                    p.y + self.dy_center)
-            for p in pts
-        ]
+    def view_transform(self, L: float, H: float) -> Transform2D:
+        """
+        S' (translate to origin), S'' (scale to fit), S''' (center) and
+        S'''' (flip y) composed into a single affine transform. Only needs
+        the cached raw bounds, so it is O(1) in the number of samples.
+        """
+        self.min_x, self.min_y = self.raw_min
+        max_x, max_y = self.raw_max - self.raw_min
 
-    def step4_flip(self, pts, H):
-        return [
-            Point2D(p.x, H - p.y)
-            for p in pts
-        ]
+        Sx = L / (max_x if max_x != 0 else 1)
+        Sy = H / (max_y if max_y != 0 else 1)
+        self.scale_factor = min(Sx, Sy)
 
-    def transform(self, L: float, H: float):
-        pts = self.raw_points
-        # S'
-        pts = self.step1_translate(pts)
-        # S''
-        pts = self.step2_scale(pts, L, H)
-        # S'''
-        pts = self.step3_center(pts, L, H)
-        # S''''
-        pts = self.step4_flip(pts, H)
-        self.points = pts
+        self.dx_center = (L - max_x * self.scale_factor) / 2
+        self.dy_center = (H - max_y * self.scale_factor) / 2
 
-    def transformed_origin(self, L: float, H: float) -> Point2D:
-        x = -self.min_x
-        y = -self.min_y
+        return (Transform2D()
+                .translation(-self.min_x, -self.min_y)
+                .scaling(self.scale_factor, self.scale_factor)
+                .translation(self.dx_center, self.dy_center)
+                .scaling(1, -1)
+                .translation(0, H))
 
-        x *= self.scale_factor
-        y *= self.scale_factor
+    def transform(self, L: float, H: float):
+        self.view = self.view_transform(L, H)
+        self._points = None
 
-        x += self.dx_center
-        y += self.dy_center
+    @property
+    def points(self) -> PointBuffer:
+        """
+        raw_points mapped to the screen through the view transform; mapped
+        lazily on first access after sampling or a transform() call.
+        """
+        if self._points is None:
+            self._points = self.view.apply_to_points(self.raw_points)
+        return self._points
 
-        y = H - y
+    def transformed_origin(self, L: float, H: float) -> Point2D:
+        return self.view.apply_to_point(Point2D(0, 0))
 
-        return Point2D(x, y)
-    
     def fcallable(self, u):
         return u
-    
+
     def gcallable(self, u):
         return u**2
 
     def ellipse(self, u, c=100, d=50):
         return u * np.sin(u) + 1, u * np.cos(u) - 2
-    
+
     def spiral(self, u):
-        return u * np.cos(u), u * np.sin(u) 
-    
-    def parabola(self, u): 
+        return u * np.cos(u), u * np.sin(u)
+
+    def parabola(self, u):
         return u, u-1
@@ -0,0 +1,144 @@
+import csv
+import functools
+import json
+from collections import deque
+from contextlib import nullcontext
+from time import perf_counter
+
+import numpy as np
+
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc):
+        self.recorder.add_time(self.name, perf_counter() - self.start)
+
+
+class PerfRecorder:
+    """
+    Per-frame timings and counters for the hot paths. Stage times and
+    counters accumulate until end_frame() (called after each paint), which
+    stores them as one frame record. While disabled nothing is recorded.
+
+    Top-level stages (paint, mouse, keys, tick) don't overlap and add up to the
+    frame's work time; compute stages are nested inside them and show
+    where that time went.
+    """
+    TOP_LEVEL = ("paint", "mouse", "keys", "tick")
+
+    def __init__(self, history: int = 600):
+        self.enabled = False
+        self.frames: deque[dict] = deque(maxlen=history)
+        self._times: dict[str, float] = {}
+        self._counters: dict[str, int] = {}
+        self._last_frame: float | None = None
+
+    def toggle(self) -> bool:
+        self.enabled = not self.enabled
+        self.reset()
+        return self.enabled
+
+    def reset(self):
+        self.frames.clear()
+        self._times = {}
+        self._counters = {}
+        self._last_frame = None
+
+    def stage(self, name: str):
+        return _Stage(self, name) if self.enabled else _NULL
+
+    def add_time(self, name: str, seconds: float):
+        self._times[name] = self._times.get(name, 0.0) + seconds
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def end_frame(self):
+        now = perf_counter()
+        frame = {name: t * 1e3 for name, t in self._times.items()}
+        frame["work"] = sum(frame.get(name, 0.0) for name in self.TOP_LEVEL)
+        if self._last_frame is not None:
+            frame["interval"] = (now - self._last_frame) * 1e3
+        frame.update(self._counters)
+
+        self.frames.append(frame)
+        self._last_frame = now
+        self._times = {}
+        self._counters = {}
+
+    def percentiles(self, name: str, q=(50, 95, 99)) -> list[float] | None:
+        values = [f[name] for f in self.frames if name in f]
+        if not values:
+            return None
+        return list(np.percentile(values, q))
+
+    def stage_names(self) -> list[str]:
+        counters = {"points", "samples", "segments"}
+        names = {k for f in self.frames for k in f} - counters - {"work", "interval"}
+        return sorted(names, key=lambda n: (n not in self.TOP_LEVEL, n))
+
+    def summary(self) -> list[str]:
+        lines = [f"frames: {len(self.frames)}   (ms: p50 / p95 / p99)"]
+        for name in ["work", "interval"] + self.stage_names():
+            p = self.percentiles(name)
+            if p is not None:
+                lines.append(f"{name:<14}{p[0]:8.2f}{p[1]:8.2f}{p[2]:8.2f}")
+
+        if self.frames:
+            last = self.frames[-1]
+            lines.append("last frame: " + "  ".join(
+                f"{name} {last.get(name, 0)}" for name in ("points", "samples", "segments")))
+        return lines
+
+    def export(self, path: str):
+        """
+        Writes every recorded frame, as CSV for a .csv path, JSON otherwise.
+        """
+        frames = list(self.frames)
+        if path.endswith(".csv"):
+            fields = sorted({k for f in frames for k in f})
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows(frames)
+        else:
+            with open(path, "w") as f:
+                json.dump({"frames": frames,
+                           "summary": {name: self.percentiles(name)
+                                       for name in ["work", "interval"] + self.stage_names()}},
+                          f, indent=2)
+
+
+def timed(stage: str, frame: bool = False):
+    """
+    Method decorator recording the call's time under `stage` in self.perf;
+    with frame=True the call also closes the current frame. When the
+    recorder is disabled the only cost is one attribute check.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *args, **kwargs):
+            perf = self.perf
+            if not perf.enabled:
+                return fn(self, *args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return fn(self, *args, **kwargs)
+            finally:
+                perf.add_time(stage, perf_counter() - start)
+                if frame:
+                    perf.end_frame()
+        return wrapper
+    return decorate
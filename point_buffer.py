@@ -0,0 +1,116 @@
+import numpy as np
+from Point2D import Point2D
+
+
+class PointBuffer:
+    """
+    Growable point storage backed by one contiguous float64 (N, 2) array.
+
+    Indexing with an int returns a Point2D view on that row (so
+    buf[i].x = 10 writes into the buffer), indexing with a slice returns a
+    PointBuffer sharing the same memory. The raw (N, 2) array is available
+    through .array for vectorized code.
+    """
+
+    def __init__(self, points=None, capacity: int = 16):
+        self._data = np.empty((max(capacity, 1), 2), dtype=float)
+        self._size = 0
+        if points is not None:
+            self.extend(points)
+
+    @classmethod
+    def from_array(cls, array, copy: bool = True):
+        arr = np.asarray(array, dtype=float).reshape(-1, 2)
+        if copy:
+            arr = np.array(arr, dtype=float, order="C")
+        buf = cls.__new__(cls)
+        buf._data = arr
+        buf._size = len(arr)
+        return buf
+
+    @property
+    def array(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    @property
+    def xs(self) -> np.ndarray:
+        return self._data[:self._size, 0]
+
+    @property
+    def ys(self) -> np.ndarray:
+        return self._data[:self._size, 1]
+
+    def _reserve(self, n: int):
+        if n <= len(self._data):
+            return
+        capacity = max(n, 2 * len(self._data))
+        data = np.empty((capacity, 2), dtype=float)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def append(self, p):
+        self._reserve(self._size + 1)
+        row = self._data[self._size]
+        if isinstance(p, Point2D):
+            row[:] = p._xy
+        else:
+            row[0], row[1] = p
+        self._size += 1
+
+    def extend(self, points):
+        if isinstance(points, PointBuffer):
+            arr = points.array
+        elif isinstance(points, np.ndarray):
+            arr = points.reshape(-1, 2)
+        else:
+            arr = np.array([(p[0], p[1]) if not isinstance(p, Point2D) else (p.x, p.y)
+                            for p in points], dtype=float).reshape(-1, 2)
+
+        n = len(arr)
+        self._reserve(self._size + n)
+        self._data[self._size:self._size + n] = arr
+        self._size += n
+
+    def clear(self):
+        self._size = 0
+
+    def copy(self):
+        return PointBuffer.from_array(self.array, copy=True)
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += self._size
+        if not 0 <= i < self._size:
+            raise IndexError("PointBuffer index out of range")
+        return i
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield Point2D.view(self._data[i])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return PointBuffer.from_array(self.array[i], copy=False)
+        return Point2D.view(self._data[self._index(i)])
+
+    def __setitem__(self, i, p):
+        if isinstance(i, slice):
+            self.array[i] = np.asarray(p, dtype=float).reshape(-1, 2)
+            return
+        row = self._data[self._index(i)]
+        if isinstance(p, Point2D):
+            row[:] = p._xy
+        else:
+            row[0], row[1] = p
+
+    def __array__(self, dtype=None, copy=None):
+        arr = self.array
+        if dtype is not None:
+            arr = arr.astype(dtype, copy=False)
+        return arr.copy() if copy else arr
+
+    def __repr__(self):
+        return f"PointBuffer({len(self)} points)"
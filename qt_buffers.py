@@ -0,0 +1,30 @@
+import numpy as np
+from PyQt5.QtGui import QPolygonF, QTransform
+
+from transformare2D import Transform2D
+
+
+def polygon_from_array(points: np.ndarray) -> QPolygonF:
+    """
+    Builds a QPolygonF from an (N, 2) array by copying it straight into the
+    polygon's storage (a QPointF is two doubles), so no per-point Python
+    objects are created.
+    """
+    n = len(points)
+    if n == 0:
+        return QPolygonF()
+
+    polygon = QPolygonF(n)
+    ptr = polygon.data()
+    ptr.setsize(n * 2 * 8)
+    np.frombuffer(ptr, dtype=np.float64).reshape(n, 2)[:] = points
+    return polygon
+
+
+def qtransform_from(T: Transform2D) -> QTransform:
+    """
+    The same affine map as a QTransform, for drawing through the painter's
+    world transform.
+    """
+    a, b, c, d, e, f = T.affine()
+    return QTransform(a, d, b, e, c, f)
@@ -0,0 +1,112 @@
+"""
+Binary scene files.
+
+    magic        8 bytes  b"DRAWSCN1"
+    header size  uint32 little-endian
+    header       UTF-8 JSON, space padded so the data starts 64-byte aligned
+    arrays       raw little-endian float64 (N, 2) arrays, each 64-byte aligned
+
+The header holds the scene settings and, for every array, its offset
+from the start of the file and its shape. Loading memory-maps the arrays
+copy-on-write, so opening a scene with millions of points only reads the
+header and pages come in as they are touched; edits never reach the file.
+"""
+import json
+import os
+
+import numpy as np
+
+MAGIC = b"DRAWSCN1"
+VERSION = 1
+ALIGN = 64
+DTYPE = np.dtype("<f8")
+
+
+class SceneError(ValueError):
+    pass
+
+
+def _aligned(n: int) -> int:
+    return -(-n // ALIGN) * ALIGN
+
+
+def save_scene(path: str, arrays: dict[str, np.ndarray], settings: dict):
+    """
+    Writes (N, 2) point arrays and JSON-serializable settings. Arrays are
+    streamed to the file straight from their buffers.
+    """
+    arrays = {name: np.asarray(a, dtype=DTYPE).reshape(-1, 2) for name, a in arrays.items()}
+
+    # the offsets depend on the header size and the header holds the
+    # offsets; settle both by growing the data start until they fit
+    start = _aligned(len(MAGIC) + 4)
+    while True:
+        layout, offset = {}, start
+        for name, a in arrays.items():
+            layout[name] = {"offset": offset, "shape": list(a.shape)}
+            offset = _aligned(offset + a.nbytes)
+
+        header = json.dumps({"version": VERSION, "settings": settings, "arrays": layout}).encode()
+        if len(MAGIC) + 4 + len(header) <= start:
+            break
+        start = _aligned(len(MAGIC) + 4 + len(header))
+
+    # written next to the target and moved over it: the arrays may be
+    # memory-mapped from the very file being replaced
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint32(start - len(MAGIC) - 4).astype("<u4").tobytes())
+        f.write(header.ljust(start - len(MAGIC) - 4))
+
+        for name, a in arrays.items():
+            f.seek(layout[name]["offset"])
+            np.ascontiguousarray(a).tofile(f)
+    os.replace(tmp, path)
+
+
+def load_scene(path: str) -> tuple[dict[str, np.ndarray], dict]:
+    """
+    Reads the header and memory-maps every array (copy-on-write). Returns
+    (arrays, settings). Raises SceneError for anything that isn't a
+    complete scene file.
+    """
+    file_size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise SceneError(f"{path} is not a scene file")
+        raw_size = f.read(4)
+        if len(raw_size) != 4:
+            raise SceneError(f"{path} is truncated")
+        size = int(np.frombuffer(raw_size, dtype="<u4")[0])
+        if len(MAGIC) + 4 + size > file_size:
+            raise SceneError(f"{path} is truncated")
+        try:
+            header = json.loads(f.read(size))
+        except ValueError:
+            raise SceneError(f"{path} has a corrupt header") from None
+
+    if not isinstance(header, dict):
+        raise SceneError(f"{path} has a corrupt header")
+    if header.get("version") != VERSION:
+        raise SceneError(f"Unsupported scene version {header.get('version')}")
+    if not isinstance(header.get("settings"), dict) or not isinstance(header.get("arrays"), dict):
+        raise SceneError(f"{path} has a corrupt header")
+
+    arrays = {}
+    for name, info in header["arrays"].items():
+        try:
+            offset = int(info["offset"])
+            shape = tuple(int(k) for k in info["shape"])
+        except (KeyError, TypeError, ValueError):
+            raise SceneError(f"{path}: bad layout for array {name!r}") from None
+        if len(shape) != 2 or shape[1] != 2 or shape[0] < 0 or offset < 0:
+            raise SceneError(f"{path}: bad layout for array {name!r}")
+        if offset + shape[0] * 2 * DTYPE.itemsize > file_size:
+            raise SceneError(f"{path} is truncated (array {name!r})")
+
+        if shape[0] == 0:
+            arrays[name] = np.empty(shape, dtype=DTYPE)
+        else:
+            arrays[name] = np.memmap(path, dtype=DTYPE, mode="c", offset=offset, shape=shape)
+    return arrays, header["settings"]
@@ -0,0 +1,74 @@
+import math
+
+import numpy as np
+
+
+class PointGrid:
+    """
+    Uniform grid over the indices of a point array, for "which point is
+    under the mouse" queries. Each cell maps to the indices of the points
+    inside it; the coordinates themselves stay in the caller's array.
+    """
+
+    def __init__(self, cell_size: float):
+        self.cell_size = float(cell_size)
+        self._cells: dict[tuple[int, int], list[int]] = {}
+
+    def _cell(self, x: float, y: float) -> tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def clear(self):
+        self._cells = {}
+
+    def insert(self, i: int, x: float, y: float):
+        self._cells.setdefault(self._cell(x, y), []).append(i)
+
+    def move(self, i: int, old_x: float, old_y: float, x: float, y: float):
+        old_cell = self._cell(old_x, old_y)
+        new_cell = self._cell(x, y)
+        if old_cell == new_cell:
+            return
+
+        bucket = self._cells[old_cell]
+        bucket.remove(i)
+        if not bucket:
+            del self._cells[old_cell]
+        self._cells.setdefault(new_cell, []).append(i)
+
+    def rebuild(self, points: np.ndarray):
+        """
+        Re-buckets every point at once: sort by cell, then slice runs of
+        equal cells, so the Python work is per cell rather than per point.
+        """
+        self._cells = {}
+        if not len(points):
+            return
+
+        keys = np.floor(points / self.cell_size).astype(np.int64)
+        order = np.lexsort((keys[:, 1], keys[:, 0]))
+        keys = keys[order]
+
+        starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        bounds = np.concatenate(([0], starts, [len(keys)]))
+
+        for a, b in zip(bounds[:-1], bounds[1:]):
+            self._cells[(int(keys[a, 0]), int(keys[a, 1]))] = order[a:b].tolist()
+
+    def find(self, points: np.ndarray, x: float, y: float, radius: float) -> int | None:
+        """
+        Lowest index i with |points[i] - (x, y)| <= radius, or None.
+        """
+        cx0, cy0 = self._cell(x - radius, y - radius)
+        cx1, cy1 = self._cell(x + radius, y + radius)
+
+        candidates = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                candidates.extend(self._cells.get((cx, cy), ()))
+        if not candidates:
+            return None
+
+        idx = np.array(candidates)
+        d2 = ((points[idx] - (x, y)) ** 2).sum(axis=1)
+        hits = idx[d2 <= radius * radius]
+        return int(hits.min()) if len(hits) else None
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+def chord_distance(p: np.ndarray, pa: np.ndarray, pb: np.ndarray) -> np.ndarray:
+    """
+    Distance of each point p from the line through pa and pb, or from pa
+    when the chord is degenerate.
+    """
+    chord = pb - pa
+    length = np.hypot(chord[:, 0], chord[:, 1])
+    offset = p - pa
+    cross = np.abs(chord[:, 0] * offset[:, 1] - chord[:, 1] * offset[:, 0])
+    return np.where(length > 0, cross / np.where(length > 0, length, 1),
+                    np.hypot(offset[:, 0], offset[:, 1]))
+
+
+def adaptive_parameters(evaluate, n_curves: int, initial: int, tolerance: float,
+                        max_samples: int, max_depth: int = 20):
+    """
+    Flatness-driven subdivision of the parameter range [0, 1] of n_curves
+    curves at once.
+
+    evaluate(ids, u) must return the (N, 2) points of curve ids[k] at u[k],
+    in the space the tolerance is measured in (pixels). Each curve starts
+    as `initial` uniform intervals; an interval is split at its midpoint
+    until its midpoint and quarter points all lie within tolerance of the
+    chord (the quarter points catch S-shaped pieces whose midpoint sits on
+    the chord). When the total number of samples would exceed max_samples,
+    the least flat intervals are split first.
+
+    Returns (ids, u), sorted by curve then parameter, including both ends
+    of every curve.
+    """
+    grid = np.arange(initial) / initial
+    ids = np.repeat(np.arange(n_curves), initial)
+    a = np.tile(grid, n_curves)
+    b = a + 1.0 / initial
+
+    pa = evaluate(ids, a)
+    pb = evaluate(ids, b)
+
+    done_ids = []
+    done_u = []
+    budget = max_samples - n_curves * (initial + 1)
+
+    for _ in range(max_depth):
+        if not len(a):
+            break
+
+        mid = (a + b) / 2
+        pm = evaluate(ids, mid)
+        pq1 = evaluate(ids, (a + mid) / 2)
+        pq3 = evaluate(ids, (mid + b) / 2)
+
+        dist = np.maximum.reduce([chord_distance(p, pa, pb) for p in (pm, pq1, pq3)])
+
+        split = dist > tolerance
+        if split.sum() > budget:
+            # not enough samples left: refine the worst intervals only
+            worst = np.argsort(-dist)[:max(budget, 0)]
+            split = np.zeros_like(split)
+            split[worst] = True
+        budget -= split.sum()
+
+        done_ids.append(ids[~split])
+        done_u.append(a[~split])
+
+        ids, mid, pm = ids[split], mid[split], pm[split]
+        a, b, pa, pb = a[split], b[split], pa[split], pb[split]
+
+        ids = np.concatenate((ids, ids))
+        a, b = np.concatenate((a, mid)), np.concatenate((mid, b))
+        pa, pb = np.concatenate((pa, pm)), np.concatenate((pm, pb))
+
+    # whatever is left after max_depth is accepted as is
+    done_ids.append(ids)
+    done_u.append(a)
+
+    # every curve also ends at u = 1
+    done_ids.append(np.arange(n_curves))
+    done_u.append(np.ones(n_curves))
+
+    ids = np.concatenate(done_ids)
+    u = np.concatenate(done_u)
+    order = np.lexsort((u, ids))
+    return ids[order], u[order]
@@ -1,38 +1,62 @@
 import numpy as np
 from Point2D import Point2D
+from point_buffer import PointBuffer
 
 class Transform2D:
+    """
+    2D affine transform kept as six scalars:
+
+        x' = a*x + b*y + c
+        y' = d*x + e*y + f
+
+    Every operation left-composes in closed form, so no temporary 3x3
+    matrices are built while dragging.
+    """
     def __init__(self):
-        self._matrix = np.eye(3, dtype=float)
+        self._a, self._b, self._c = 1.0, 0.0, 0.0
+        self._d, self._e, self._f = 0.0, 1.0, 0.0
 
     def get_matrix(self):
-        return self._matrix
-    
-    def _left_transform(self, transform_matrix: np.ndarray):
-        self._matrix = transform_matrix @ self._matrix
+        return np.array([[self._a, self._b, self._c],
+                         [self._d, self._e, self._f],
+                         [0, 0, 1]],
+                         dtype=float)
+
+    def affine(self) -> tuple[float, float, float, float, float, float]:
+        return (self._a, self._b, self._c, self._d, self._e, self._f)
+
+    def _left_transform(self, A: float, B: float, C: float,
+                        D: float, E: float, F: float):
+        # [A B C; D E F; 0 0 1] @ self
+        a, b, c = self._a, self._b, self._c
+        d, e, f = self._d, self._e, self._f
+
+        self._a = A*a + B*d
+        self._b = A*b + B*e
+        self._c = A*c + B*f + C
+        self._d = D*a + E*d
+        self._e = D*b + E*e
+        self._f = D*c + E*f + F
 
     def translation(self, dx: float, dy: float):
-        A = np.array([[1, 0, dx],
-                      [0, 1, dy],
-                      [0, 0, 1]], 
-                      dtype=float)
-        self._left_transform(A)
+        self._c += float(dx)
+        self._f += float(dy)
         return self
-    
+
     def scaling(self, sx: float, sy: float):
-        A = np.array([[sx, 0, 0],
-                      [0, sy, 0],
-                      [0, 0, 1]], 
-                      dtype=float)
-        self._left_transform(A)
+        sx, sy = float(sx), float(sy)
+        self._a *= sx
+        self._b *= sx
+        self._c *= sx
+        self._d *= sy
+        self._e *= sy
+        self._f *= sy
         return self
 
     def rotation(self, cos_a: float, sin_a: float):
-        A = np.array([[ cos_a, -sin_a, 0],
-                      [ sin_a,  cos_a, 0],
-                      [0, 0, 1]], 
-                      dtype=float)
-        self._left_transform(A)
+        cos_a, sin_a = float(cos_a), float(sin_a)
+        self._left_transform(cos_a, -sin_a, 0.0,
+                             sin_a,  cos_a, 0.0)
         return self
 
     def symmetry_x(self):
@@ -43,15 +67,43 @@ class Transform2D:
 
     def symmetry_origin(self):
         return self.scaling(-1, -1)
-    
+
     def scale_about_point(self, sx: float, sy: float, cx: float, cy: float):
-        return self.translation(-cx, -cy).scaling(sx, sy).translation(cx, cy)
+        # T(c) S T(-c) fused into one affine step
+        sx, sy, cx, cy = float(sx), float(sy), float(cx), float(cy)
+        self._left_transform(sx, 0.0, cx - sx*cx,
+                             0.0, sy, cy - sy*cy)
+        return self
 
     def rotate_about_point(self, cos_a: float, sin_a: float, cx: float, cy: float):
-        return self.translation(-cx, -cy).rotation(cos_a, sin_a).translation(cx, cy)
-    
+        # T(c) R T(-c) fused into one affine step
+        cos_a, sin_a, cx, cy = float(cos_a), float(sin_a), float(cx), float(cy)
+        self._left_transform(cos_a, -sin_a, cx - cos_a*cx + sin_a*cy,
+                             sin_a,  cos_a, cy - sin_a*cx - cos_a*cy)
+        return self
+
     def apply_to_point(self, point: Point2D) -> Point2D:
-        vec = point.toVector()
-        transformed_vec = self._matrix @ vec
-        return Point2D(transformed_vec[0] / transformed_vec[2],
-                       transformed_vec[1] / transformed_vec[2])
+        x, y = point.x, point.y
+        return Point2D(self._a*x + self._b*y + self._c,
+                       self._d*x + self._e*y + self._f)
+
+    def apply_to_array(self, points: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Transforms a whole (N, 2) array with one multiply-add. out may be
+        the input array itself for an in-place update.
+        """
+        points = np.asarray(points, dtype=float)
+        if out is None:
+            out = np.empty_like(points)
+
+        linear = np.array([[self._a, self._d],
+                           [self._b, self._e]])
+        np.matmul(points, linear, out=out)
+        out += (self._c, self._f)
+        return out
+
+    def apply_to_points(self, points: PointBuffer, out: PointBuffer | None = None) -> PointBuffer:
+        if out is None or len(out) != len(points):
+            out = PointBuffer.from_array(np.empty_like(points.array), copy=False)
+        self.apply_to_array(points.array, out=out.array)
+        return out
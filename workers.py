@@ -0,0 +1,78 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from time import perf_counter
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+
+class CurveWorkers(QObject):
+    """
+    Runs curve computations on worker threads and hands the results back
+    on the GUI thread.
+
+    Jobs are grouped by kind ("interpolation", "parametric", ...). Each
+    submit() starts a new generation for its kind: a job of the same kind
+    that is still queued is cancelled, and the result of one that is
+    already running is dropped when it arrives. So only the latest job's
+    result is ever delivered, and until then the caller keeps showing
+    what it had.
+    """
+    # kind, generation, future; emitted from the worker thread, so Qt
+    # queues the call to _deliver onto the GUI thread
+    _finished = pyqtSignal(str, int, object)
+
+    def __init__(self, parent=None, max_workers: int = 2):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix="curve")
+        self.generation: dict[str, int] = {}
+        self._pending: dict[str, tuple[Future, callable, callable]] = {}
+        self._finished.connect(self._deliver)
+
+    def submit(self, kind: str, fn, on_result, on_error=None) -> int:
+        """
+        Runs fn() on a worker and calls on_result(result, seconds) on the
+        GUI thread, unless a newer job of the same kind was submitted or
+        cancel() was called in the meantime.
+        """
+        generation = self.cancel(kind)
+
+        def run():
+            start = perf_counter()
+            result = fn()
+            return result, perf_counter() - start
+
+        future = self.executor.submit(run)
+        self._pending[kind] = (future, on_result, on_error)
+        future.add_done_callback(lambda f: f.cancelled() or self._finished.emit(kind, generation, f))
+        return generation
+
+    def cancel(self, kind: str) -> int:
+        """
+        Supersedes the pending job of this kind, if any, and returns the
+        new generation.
+        """
+        pending = self._pending.pop(kind, None)
+        if pending is not None:
+            pending[0].cancel()
+        self.generation[kind] = self.generation.get(kind, 0) + 1
+        return self.generation[kind]
+
+    def busy(self, kind: str) -> bool:
+        return kind in self._pending
+
+    def shutdown(self):
+        for kind in list(self._pending):
+            self.cancel(kind)
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _deliver(self, kind: str, generation: int, future: Future):
+        if generation != self.generation.get(kind):
+            return  # superseded while it ran
+
+        _, on_result, on_error = self._pending.pop(kind)
+        error = future.exception()
+        if error is None:
+            on_result(*future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            print(f"Computing the {kind} curve failed: {error}")